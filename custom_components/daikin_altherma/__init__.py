@@ -1,359 +1,203 @@
 """The Daikin Altherma integration."""
 from __future__ import annotations
 
+import asyncio
 import logging
-from asyncio import CancelledError
 from datetime import timedelta
+from typing import TYPE_CHECKING
 
 import async_timeout
-from aiohttp import ClientConnectionError, ServerTimeoutError
-from homeassistant.components.water_heater import STATE_OFF, STATE_ON, STATE_PERFORMANCE
+from aiohttp import ClientError
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_HOST
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.entity import DeviceInfo
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from homeassistant.util import Throttle
-from pyaltherma.comm import DaikinWSConnection
-from pyaltherma.controllers import AlthermaController
 
-from .const import DOMAIN, MIN_TIME_BETWEEN_UPDATES_SECONDS, UPDATE_INTERVAL_SECONDS, ASYNC_UPDATE_TIMEOUT_SECONDS, \
-    MAX_UPDATE_FAILED
+from .coordinator import AlthermaCoordinator
+from .const import DOMAIN, UNIT_UPDATE_INTERVAL_OPTIONS, DEFAULT_OPTIONS, CONF_UPDATE_INTERVAL, \
+    CONF_MIN_TIME_BETWEEN_UPDATES
+from .history import ConsumptionHistory, async_register_services as async_register_history_services
+from .operations import build_operation_table
+from .storage import AlthermaStore
 
+if TYPE_CHECKING:
+    from .api import AlthermaAPI
+    from .timeouts import AdaptiveTimeouts
+
+# The adapter API and pyaltherma are imported when an entry is set up, platforms only when they have entities
 PLATFORMS = ["water_heater", "sensor", "switch", "select", "number", "binary_sensor"]
-MIN_TIME_BETWEEN_UPDATES = timedelta(seconds=MIN_TIME_BETWEEN_UPDATES_SECONDS)
 _LOGGER = logging.getLogger(__name__)
 
 
-async def setup_api_instance(hass, host):
+async def setup_api_instance(hass, host, timeouts: AdaptiveTimeouts = None, connection_factory=None) -> AlthermaAPI:
+    from .api import async_create_api
+
     session = async_get_clientsession(hass)
-    conn = DaikinWSConnection(session, host)
-    device = AlthermaController(conn)
-    await device.discover_units()
+    return await async_create_api(session, host, timeouts, connection_factory)
+
+
+async def restore_api_instance(hass, host, data: dict) -> AlthermaAPI:
+    """Create the API from the stored profiles and the last known status without connecting to the adapter."""
+    from .api import async_restore_api
+
+    return await async_restore_api(async_get_clientsession(hass), host, data)
 
-    unit_profiles = device.profiles
 
-    # Uncomment this if you want to store profile info in json files.
-    # try:
-    #    import os
-    #    import json
-    #    for profile in unit_profiles:
-    #        filepath: str = os.path.join(hass.config.config_dir, f'daikin_altherma_{profile["idx"]}.json')
-    #        with open(filepath, 'w') as f:
-    #            f.write(json.dumps(profile['profile']))
-    # except Exception as e:
-    #    _LOGGER.warning(f'Failed to save profile state to file {filepath}. It does not affect the operation of the integration.', exc_info=True)
+def get_api(hass: HomeAssistant, serial_number: str = None) -> AlthermaAPI | None:
+    """
+    API of a loaded adapter for other integrations and scripts, for example to subscribe to its status.
+    Without a serial number the API is returned if exactly one adapter is loaded.
+    """
+    apis = list(hass.data.get(DOMAIN, {}).values())
+    if serial_number is None:
+        return apis[0] if len(apis) == 1 else None
+    return next((api for api in apis if api.info['serial_number'] == serial_number), None)
 
-    api = AlthermaAPI(device)
-    await api.api_init()
-    return api
 
+def entry_platforms(api: AlthermaAPI) -> list:
+    """Platforms which have entities for the discovered units. Sensor is always set up for the diagnostics."""
+    device = api.device
+    platforms = {"sensor"}
+    if device.hot_water_tank is not None:
+        platforms.update(["water_heater", "binary_sensor"])
+    if device.climate_control is not None:
+        platforms.update(["switch", "select", "number", "binary_sensor"])
+    platforms.update(platform for platform, descriptions in api.operation_table.items() if descriptions)
+    return [platform for platform in PLATFORMS if platform in platforms]
 
-def create_update_function(api):
+
+def create_update_function(api, store: AlthermaStore, unit_function: str):
     _api = api
 
     async def async_update_data():
         try:
-            async with async_timeout.timeout(ASYNC_UPDATE_TIMEOUT_SECONDS):
-                await _api.async_update()
+            async with async_timeout.timeout(_api.update_timeout):
+                await _api.async_update_units([unit_function])
         except:
             raise
+        if _api.available and not _api.stale:
+            store.async_schedule_save_status(_api)
+            _api.history.async_record(unit_function, _api.status.get(unit_function))
+        return _api.channel_data(unit_function)
 
     return async_update_data
 
 
+def _update_interval(unit_function: str, options: dict) -> timedelta:
+    option = UNIT_UPDATE_INTERVAL_OPTIONS.get(unit_function)
+    seconds = options[option] if option is not None else 0
+    return timedelta(seconds=seconds or options[CONF_UPDATE_INTERVAL])
+
+
+def create_channels(hass, api, store: AlthermaStore, options: dict):
+    """Create an update channel (coordinator) for each unit function, so listeners wake only for their unit."""
+    for unit_function in api.device.altherma_units:
+        api.channels[unit_function] = AlthermaCoordinator(
+            hass,
+            _LOGGER,
+            name=f"daikin_altherma_coordinator {unit_function}",
+            update_method=create_update_function(api, store, unit_function),
+            update_interval=_update_interval(unit_function, options),
+            min_interval=options[CONF_MIN_TIME_BETWEEN_UPDATES],
+            # Listeners are notified only if the unit status or the availability changed
+            always_update=False,
+        )
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Daikin Altherma from a config entry."""
     conf = entry.data
     hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][entry.entry_id] = api = await setup_api_instance(
-        hass, conf[CONF_HOST]
-    )
+    store = AlthermaStore(hass, entry.entry_id)
+    stored = await store.async_load()
+    restored = 'profiles' in stored and 'status' in stored
+    # Imported here, so loading the integration does not import pyaltherma
+    from pyaltherma.errors import AlthermaException
+    from .profiler import async_register_services
+    from .timeouts import AdaptiveTimeouts
+
+    if restored:
+        # Entities show the last known status until the adapter answers in the background
+        api = await restore_api_instance(hass, conf[CONF_HOST], stored)
+    else:
+        try:
+            api = await setup_api_instance(hass, conf[CONF_HOST], AdaptiveTimeouts(stored.get('timeouts')))
+        except (ClientError, OSError, asyncio.TimeoutError, AlthermaException) as error:
+            raise ConfigEntryNotReady(f'Unable to connect to {conf[CONF_HOST]}: {error}') from error
+        # The profiles are stored in .storage/daikin_altherma.<entry_id>, which is handy for reporting issues
+        try:
+            await store.async_save_profiles(api)
+        except Exception:
+            _LOGGER.warning('Failed to save the unit profiles. It does not affect the operation of the integration.',
+                            exc_info=True)
+    api.history = ConsumptionHistory(hass, entry.entry_id)
+    await api.history.async_load()
     hass.data[DOMAIN][entry.entry_id] = api
-    coordinator = DataUpdateCoordinator(
-        hass,
-        _LOGGER,
-        name="daikin_altherma_coordinator",
-        update_method=create_update_function(api),
-        update_interval=timedelta(seconds=UPDATE_INTERVAL_SECONDS),
-    )
-    await coordinator.async_refresh()
-    hass.data[DOMAIN]['coordinator'] = coordinator
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    options = {**DEFAULT_OPTIONS, **entry.options}
+    api.configure(options)
+    api.operation_table = build_operation_table(api.device)
+    create_channels(hass, api, store, options)
+    entry.async_on_unload(entry.add_update_listener(async_options_updated))
+    await hass.config_entries.async_forward_entry_setups(entry, entry_platforms(api))
+    async_register_services(hass)
+    async_register_history_services(hass)
+    if restored:
+        api.connect_task = entry.async_create_background_task(
+            hass, async_connect_restored(hass, entry, api, store), f'{DOMAIN} connect {api.host}'
+        )
 
     return True
 
 
+async def async_connect_restored(hass, entry, api, store: AlthermaStore):
+    """Refresh the restored entities and check that the stored profiles still match the adapter."""
+    from pyaltherma.errors import AlthermaException
+
+    # One refresh of every channel with its update timeout, then every channel continues on its own schedule
+    await asyncio.gather(*(channel.async_refresh() for channel in api.channels.values()))
+    if api.stale:
+        # The adapter is not reachable yet, the coordinator keeps polling
+        return
+    try:
+        info = await api.device.device_info()
+        await api.async_release_connection()
+    except (ClientError, OSError, asyncio.TimeoutError, AlthermaException):
+        _LOGGER.debug('Failed to read the adapter info', exc_info=True)
+        return
+    if info['firmware'] != api.info['firmware']:
+        _LOGGER.info(f"Adapter firmware changed from {api.info['firmware']} to {info['firmware']}. "
+                     f"Discovering the units again.")
+        await store.async_clear_profiles()
+        hass.config_entries.async_schedule_reload(entry.entry_id)
+
+
+async def async_options_updated(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply the changed options to the running API and update channels, without a reload."""
+    api = hass.data[DOMAIN][entry.entry_id]
+    options = {**DEFAULT_OPTIONS, **entry.options}
+    api.configure(options)
+    for unit_function, channel in api.channels.items():
+        channel.set_rate(_update_interval(unit_function, options), options[CONF_MIN_TIME_BETWEEN_UPDATES])
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    api = hass.data[DOMAIN][entry.entry_id]
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, entry_platforms(api))
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id)
+        if api.connect_task is not None:
+            api.connect_task.cancel()
+        # A fetch is shared by the update channels and not cancelled with them
+        await api.async_cancel_updates()
+        # The connection may be kept open between updates
+        await api.device.ws_connection.close()
 
     return unload_ok
 
 
-class AlthermaAPI:
-    def __init__(self, device: AlthermaController) -> None:
-        """Initialize the Daikin Handle."""
-        self._device = device
-        self.host = device.ws_connection.host
-        self._status = None
-        self._info = None
-        self._available = True
-        self._hwt_device_info = None
-        self._space_heating_device_info = None
-
-        self._climate_control_powered = False
-        self._failed_updates = 0
-        self._type_error_failure = 0
-
-    async def turn_on_climate_control(self):
-        await self._device.climate_control.turn_on()
-        self._climate_control_powered = True
-
-    async def turn_off_climate_control(self):
-        await self._device.climate_control.turn_off()
-        self._climate_control_powered = False
-
-    async def async_is_climate_control_on(self):
-        self._climate_control_powered = await self._device.climate_control.is_turned_on
-        return self.is_climate_control_on()
-
-    def is_climate_control_on(self):
-        return self._climate_control_powered
-
-    @property
-    def status(self):
-        return self._status
-
-    @property
-    def info(self):
-        return self._info
-
-    @property
-    def water_tank_status(self):
-        if "function/DomesticHotWaterTank" in self._status:
-            return self._status["function/DomesticHotWaterTank"]
-        if "function/DomesticHotWater" in self._status:
-            return self._status["function/DomesticHotWater"]
-
-    @property
-    def space_heating_status(self):
-        return self._status["function/SpaceHeating"]
-
-    @property
-    def device(self) -> AlthermaController:
-        return self._device
-
-    async def api_init(self):
-        self._status = await self.device.get_current_state()
-        self._info = await self.device.device_info()
-        if self._device.climate_control is not None:
-            self._climate_control_powered = await self._device.climate_control.is_turned_on
-        else:
-            self._climate_control_powered = False
-
-        await self.get_HWT_device_info()
-        await self.get_space_heating_device_info()
-        await self._device.ws_connection.close()
-
-    def get_state(self, state_key):
-        if self.status is not None:
-            state = False
-            if 'function/DomesticHotWaterTank' in self.status:
-                dhw_states = self.status['function/DomesticHotWaterTank']['states']
-                if 'InstallerState' in dhw_states:
-                    state = state | dhw_states['InstallerState']
-            elif 'function/DomesticHotWater' in self.status:
-                dhw_states = self.status['function/DomesticHotWater']['states']
-                if 'InstallerState' in dhw_states:
-                    state = state | dhw_states['InstallerState']
-            else:
-                state = False
-
-            if 'function/SpaceHeating' in self.status:
-                sh_states = self.status['function/SpaceHeating']['states']
-                if 'InstallerState' in sh_states:
-                    state = state | sh_states['InstallerState']
-
-            return state
-        return None
-
-    async def refresh_unit(self):
-        self.device.refresh()
-
-    @Throttle(MIN_TIME_BETWEEN_UPDATES)
-    async def async_update(self, **kwargs):
-        """Pull the latest data from Daikin."""
-        try:
-            prev_installer_state = self.get_state('InstallerState')
-            self._status = await self.device.get_current_state()
-            self._climate_control_powered = await self._device.climate_control.is_turned_on
-            installer_state = self.get_state('InstallerState')
-            if prev_installer_state is not None and prev_installer_state != installer_state and installer_state is False:
-                # Leaving installer mode can have changes which may not be refreshed properly
-                # For example from fixed temperature to weather dependent are read from profile during initialization
-                # and it should update the profile after installer state
-                _LOGGER.warning(
-                    'Unit left installer state. If there are heavy changes it is probably better to reload integration. Currently it may not fully incorporate new settings.')
-
-                await self.refresh_unit()
-
-            await self.device.ws_connection.close()
-
-            if not self._available:
-                _LOGGER.info('Daikin became available again.')
-
-            self._available = True
-            self._failed_updates = 0
-            self._type_error_failure = 0
-        except TypeError as e:
-            # Report only once
-            self._type_error_failure += 1
-            if self._type_error_failure < 2:
-                _LOGGER.error(f'Failed to update the device status with error {e}', e)
-
-        except (ClientConnectionError, ServerTimeoutError, CancelledError) as error:
-            self._failed_updates += 1
-            if self._available:
-                # report only once
-                _LOGGER.error(f"Failed to the get the data from the device [{self.host}] ({error})", exc_info=True)
-            self._available = False
-            # self._failed_updates += 1
-            # if self._failed_updates < 2
-            #    _LOGGER.error(f'Too many failed updates. Making component unavailable.')
-            #    self._available = False
-            # Report only once
-            # if self._failed_updates == 1:
-            #    _LOGGER.error(f'Failed update status from heat-pump. ({error})')
-        except:
-            if self._available:
-                _LOGGER.error(f'Something went wrong while updating data from the device', exc_info=True)
-            self._available = False
-
-    @property
-    def available(self) -> bool:
-        """Return True if entity is available."""
-        return self._available
-
-    @property
-    def device_info(self) -> DeviceInfo:
-        return DeviceInfo(
-            **{
-                "identifiers": {(DOMAIN, self._info["serial_number"])},
-                "name": self._info["duty"],
-                "manufacturer": self._info["manufacturer"],
-                "model": self._info["model_name"],
-                "sw_version": self._info["firmware"],
-            }
-        )
-
-    async def get_HWT_device_info(self) -> DeviceInfo:
-        if self._hwt_device_info is None:
-            hwt = self.device.hot_water_tank
-            if hwt is None:
-                return None
-
-            self._hwt_device_info = DeviceInfo(
-                **{
-                    "identifiers": {(DOMAIN, f"{self._info['serial_number']} Hot Water Tank")},
-                    # "name": self._info["duty"],
-                    "name": "Hot Water Tank",
-                    "manufacturer": self._info["manufacturer"],
-                    "model": await hwt.model_number,
-                    "sw_version": f"{await hwt.indoor_software}/{await hwt.outdoor_software}",
-                }
-            )
-        return self._hwt_device_info
-
-    async def get_space_heating_device_info(self) -> DeviceInfo:
-        if self._space_heating_device_info is None:
-            space_heating = self.device.climate_control
-            if space_heating is None:
-                return None
-
-            self._space_heating_device_info = DeviceInfo(
-                **{
-                    "identifiers": {(DOMAIN, f"{self._info['serial_number']} Space Heating")},
-                    # "name": self._info["duty"],
-                    "name": "Space Heating",
-                    "manufacturer": self._info["manufacturer"],
-                    "model": await space_heating.model_number,
-                    "sw_version": f"{await space_heating.indoor_software}/{await space_heating.outdoor_software}",
-                }
-            )
-        return self._space_heating_device_info
-
-    @property
-    def HWT_device_info(self):
-        return self._hwt_device_info
-
-    @property
-    def space_heating_device_info(self):
-        return self._space_heating_device_info
-
-    @property
-    def water_tank_operation(self):
-        status = self.water_tank_status
-        ops = status["operations"]
-        is_on = ops["Power"] == "on"
-        # First check if it is on and if yes then check whatever it is in powerful mode
-        if is_on:
-            if 'powerful' in ops:
-                state = ops["powerful"]
-            else:
-                state = 0
-
-            if state == 0:
-                return STATE_ON
-            else:
-                return STATE_PERFORMANCE
-        else:
-            return STATE_OFF
-
-    def hwt_powerful_support(self):
-        device = self.device
-        if device.hot_water_tank is None:
-            return False
-        powerful_support = 'powerful' in [x.lower() for x in device.hot_water_tank.operations]
-        return powerful_support
-
-    async def async_set_water_tank_state(self, state):
-        """
-        Sets new hot water tank state. It can be off / on / powerful
-        @param state: string
-        @return: Nothing
-        """
-        if state == STATE_OFF:
-            if self.hwt_powerful_support():
-                await self.device.hot_water_tank.set_powerful(False)
-            await self.device.hot_water_tank.turn_off()
-        elif state == STATE_ON:
-            await self.device.hot_water_tank.turn_on()
-            if self.hwt_powerful_support():
-                await self.device.hot_water_tank.set_powerful(False)
-        else:
-            await self.device.hot_water_tank.turn_on()
-
-            if self.hwt_powerful_support():
-                await self.device.hot_water_tank.set_powerful(True)
-        await self.device.ws_connection.close()
-
-    @property
-    def water_tank_target_temp_config(self) -> dict:
-        """
-        Returns the configuration values for target temperature.
-        Normally it should have the maximum, minimum and step numbers
-        @rtype: dict
-        """
-
-        if "DomesticHotWaterTemperatureHeating" in self.device.hot_water_tank._unit.operation_config:
-            return self.device.hot_water_tank._unit.operation_config["DomesticHotWaterTemperatureHeating"]
-
-        if "TargetTemperature" in self.device.hot_water_tank._unit.operation_config:
-            return self.device.hot_water_tank._unit.operation_config["TargetTemperature"][
-                "heating"
-            ]
-        return {}
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored profiles and the consumption history of a config entry."""
+    await AlthermaStore(hass, entry.entry_id).async_remove()
+    await ConsumptionHistory(hass, entry.entry_id).async_remove()
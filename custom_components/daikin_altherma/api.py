@@ -0,0 +1,655 @@
+"""API of the Daikin Altherma adapter used by the integration and the command line tool."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from asyncio import CancelledError
+from typing import Callable
+
+import async_timeout
+from aiohttp import ClientConnectionError, ServerTimeoutError
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.util import dt as dt_util
+from pyaltherma.controllers import AlthermaController
+from pyaltherma.errors import AlthermaException
+
+from .connection import AlthermaConnection
+from .controller import AlthermaDeviceController
+from .const import DOMAIN, DEFAULT_OPTIONS, CONF_CONSUMPTION_INTERVAL, CONF_UPDATE_TIMEOUT, CONF_REQUEST_TIMEOUT, \
+    CONF_KEEP_CONNECTION, CONF_MAX_UPDATE_FAILED, CONF_UNAVAILABLE_GRACE, CONF_TEMPERATURE_DEADBAND, \
+    CONF_TEMPERATURE_HEARTBEAT, RESOURCE_RETRIES
+from .consumption import aggregate_consumption, bucket_of
+from .metrics import AdapterMetrics
+from .resources import ABSENT, INVALID, UNKNOWN, UnitResource, build_resource_index, decode_response
+from .stream import StatusIterator, StatusStream
+from .timeouts import AdaptiveTimeouts, POLL
+from .unsupported import UnsupportedResources
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_create_api(session, host, timeouts: AdaptiveTimeouts = None,
+                           connection_factory=None) -> AlthermaAPI:
+    """Discover the units behind the adapter at host and return an initialized API.
+
+    It does not depend on Home Assistant, so it can also be used by the command line tool.
+    The connection_factory creates the connection, for example a ReplayConnection which answers from a capture.
+    """
+    metrics = AdapterMetrics()
+    timeouts = timeouts if timeouts is not None else AdaptiveTimeouts()
+    connection_factory = connection_factory if connection_factory is not None else AlthermaConnection
+    conn = connection_factory(session, host, metrics=metrics, timeouts=timeouts)
+    device = AlthermaDeviceController(conn)
+    await device.discover_units()
+
+    api = AlthermaAPI(device, metrics, timeouts)
+    await api.api_init()
+    return api
+
+
+async def async_restore_api(session, host, data: dict) -> AlthermaAPI:
+    """Create the API from the profiles and the last known status saved by AlthermaStore, without any requests."""
+    metrics = AdapterMetrics()
+    timeouts = AdaptiveTimeouts(data.get('timeouts'))
+    unsupported = data.get('unsupported', {})
+    # The resources are known for the firmware the profiles were discovered with
+    if unsupported.get('firmware') == data['info']['firmware']:
+        unsupported = UnsupportedResources(unsupported.get('resources', []))
+    else:
+        unsupported = UnsupportedResources()
+    conn = AlthermaConnection(session, host, metrics=metrics, timeouts=timeouts, unsupported=unsupported)
+    device = AlthermaDeviceController(conn)
+    await device.async_load_profiles(data['profiles'])
+    api = AlthermaAPI(device, metrics, timeouts)
+    api.restore(data)
+    return api
+
+
+class AlthermaAPI:
+    def __init__(self, device: AlthermaController, metrics: AdapterMetrics = None,
+                 timeouts: AdaptiveTimeouts = None) -> None:
+        """Initialize the Daikin Handle."""
+        self._device = device
+        self._metrics = metrics if metrics is not None else AdapterMetrics()
+        self._timeouts = timeouts if timeouts is not None else AdaptiveTimeouts()
+        self.host = device.ws_connection.host
+        self._status = None
+        self._info = None
+        self._available = True
+        self._stale = False
+        # The last update failed, but the entities are still available with the last status
+        self._unconfirmed = False
+        # time.monotonic() of the first of the failed updates in a row
+        self._failing_since = None
+        self._hwt_device_info = None
+        self._space_heating_device_info = None
+
+        self._climate_control_powered = False
+        self._failed_updates = 0
+        self._type_error_failure = 0
+        self._max_update_failed = DEFAULT_OPTIONS[CONF_MAX_UPDATE_FAILED]
+        self._unavailable_grace = DEFAULT_OPTIONS[CONF_UNAVAILABLE_GRACE]
+        self._update_timeout = DEFAULT_OPTIONS[CONF_UPDATE_TIMEOUT]
+        self._consumption_interval = DEFAULT_OPTIONS[CONF_CONSUMPTION_INTERVAL]
+        self._keep_connection = DEFAULT_OPTIONS[CONF_KEEP_CONNECTION]
+        self._temperature_deadband = DEFAULT_OPTIONS[CONF_TEMPERATURE_DEADBAND]
+        self._temperature_heartbeat = DEFAULT_OPTIONS[CONF_TEMPERATURE_HEARTBEAT]
+        self._consumption_updated = {}
+        # Resources of the status per unit function, built from the profile on the first read
+        self._resources = {}
+        # Resources per unit function without a valid response in the last update
+        self._missing = {}
+        self._stream = StatusStream()
+        self._aggregates = None
+        self._aggregate_sources = None
+        self._aggregate_month = None
+        # Fetch in progress per unit function, concurrent updates of a unit join it
+        self._in_flight = {}
+        # Update coordinator per unit function, created by the integration setup
+        self.channels = {}
+        # Local consumption history, created by the integration setup
+        self.history = None
+        # Settable operations without a dedicated entity per platform, created by the integration setup
+        self.operation_table = {}
+        # Connection of an API restored from storage in the background, started by the integration setup
+        self.connect_task = None
+
+    async def turn_on_climate_control(self):
+        await self._device.climate_control.turn_on()
+        self._climate_control_powered = True
+
+    async def turn_off_climate_control(self):
+        await self._device.climate_control.turn_off()
+        self._climate_control_powered = False
+
+    async def async_is_climate_control_on(self):
+        self._climate_control_powered = await self._device.climate_control.is_turned_on
+        return self.is_climate_control_on()
+
+    def is_climate_control_on(self):
+        return self._climate_control_powered
+
+    @property
+    def status(self):
+        return self._status
+
+    @property
+    def consumption_aggregates(self) -> dict:
+        """
+        Aggregates of the consumption of all units, see aggregate_consumption. They are calculated again only
+        when the consumption of a unit was read again or a month started, and are shared by all the aggregate
+        sensors.
+        """
+        status = self._status or {}
+        now = dt_util.now()
+        month = bucket_of('M', now)
+        sources = [unit_status.get('consumption') for unit_status in status.values()]
+        if (self._aggregate_sources is None or len(sources) != len(self._aggregate_sources)
+                or any(source is not cached for source, cached in zip(sources, self._aggregate_sources))
+                or month != self._aggregate_month):
+            self._aggregates = aggregate_consumption(status, now)
+            self._aggregate_sources = sources
+            self._aggregate_month = month
+        return self._aggregates
+
+    @property
+    def info(self):
+        return self._info
+
+    @property
+    def stale(self) -> bool:
+        """
+        True while the status is restored from storage and not confirmed by the adapter, or while the last status
+        is kept after failed updates.
+        """
+        return self._stale or self._unconfirmed
+
+    @property
+    def water_tank_status(self):
+        if "function/DomesticHotWaterTank" in self._status:
+            return self._status["function/DomesticHotWaterTank"]
+        if "function/DomesticHotWater" in self._status:
+            return self._status["function/DomesticHotWater"]
+
+    @property
+    def space_heating_status(self):
+        return self._status["function/SpaceHeating"]
+
+    @property
+    def device(self) -> AlthermaController:
+        return self._device
+
+    def channel(self, unit_function: str):
+        """Update coordinator of the unit function"""
+        return self.channels[unit_function]
+
+    def channel_data(self, unit_function: str):
+        """
+        Data of the unit function channel. Listeners are notified when it changes, so the entities show the stale
+        attribute as soon as the status is kept after a failed update.
+        """
+        status = self._status.get(unit_function) if self._status is not None else None
+        return self._available, self.stale, status
+
+    @property
+    def metrics(self) -> AdapterMetrics:
+        return self._metrics
+
+    def configure(self, options: dict):
+        """Applies the options of the config entry, see DEFAULT_OPTIONS."""
+        self._max_update_failed = options[CONF_MAX_UPDATE_FAILED]
+        self._unavailable_grace = options[CONF_UNAVAILABLE_GRACE]
+        self._update_timeout = options[CONF_UPDATE_TIMEOUT]
+        self._consumption_interval = options[CONF_CONSUMPTION_INTERVAL]
+        self._keep_connection = options[CONF_KEEP_CONNECTION]
+        self._temperature_deadband = options[CONF_TEMPERATURE_DEADBAND]
+        self._temperature_heartbeat = options[CONF_TEMPERATURE_HEARTBEAT]
+        # A fixed request timeout replaces the learned ones
+        self._device.ws_connection._timeout = options[CONF_REQUEST_TIMEOUT] or None
+
+    @property
+    def deadband(self) -> tuple:
+        """@return: (deadband in °C, heartbeat in seconds) of the temperatures"""
+        return self._temperature_deadband, self._temperature_heartbeat
+
+    @property
+    def update_timeout(self) -> float:
+        """Timeout of an update of the units, learned from the adapter unless it is set in the options."""
+        return self._update_timeout or self._timeouts.timeout(POLL)
+
+    async def async_release_connection(self):
+        """Closes the connection after a request, unless the options keep it open for the next one."""
+        if not self._keep_connection:
+            await self._device.ws_connection.close()
+
+    @property
+    def unsupported(self) -> UnsupportedResources:
+        """Resources the adapter does not support, they are skipped by the connection."""
+        return self._device.ws_connection.unsupported
+
+    @property
+    def timeouts(self) -> AdaptiveTimeouts:
+        """Timeouts learned from the latency of the adapter, the connection shares them."""
+        return self._timeouts
+
+    async def api_init(self):
+        started = time.monotonic()
+        self._status = {
+            unit_function: await self._async_read_unit(unit_function, started)
+            for unit_function in self._device.altherma_units
+        }
+        self._info = await self.device.device_info()
+        if self._device.climate_control is not None:
+            self._climate_control_powered = await self._device.climate_control.is_turned_on
+        else:
+            self._climate_control_powered = False
+
+        await self.get_HWT_device_info()
+        await self.get_space_heating_device_info()
+        await self.async_release_connection()
+
+    def restore(self, data: dict):
+        """
+        Restores the adapter info, the unit device info and the last known status from storage.
+        The status is stale until the next successful update.
+        @param data: data saved by AlthermaStore
+        """
+        self._info = data['info']
+        self._status = data['status']
+        self._stale = True
+        device_info = data.get('device_info', {})
+        if self.device.hot_water_tank is not None and device_info.get('hot_water_tank') is not None:
+            self._hwt_device_info = self._unit_device_info('Hot Water Tank', **device_info['hot_water_tank'])
+        if self.device.climate_control is not None and device_info.get('space_heating') is not None:
+            self._space_heating_device_info = self._unit_device_info('Space Heating', **device_info['space_heating'])
+            operations = self._status.get('function/SpaceHeating', {}).get('operations', {})
+            self._climate_control_powered = operations.get('Power') == 'on'
+
+    def get_state(self, state_key):
+        if self.status is not None:
+            state = False
+            if 'function/DomesticHotWaterTank' in self.status:
+                dhw_states = self.status['function/DomesticHotWaterTank']['states']
+                if 'InstallerState' in dhw_states:
+                    state = state | dhw_states['InstallerState']
+            elif 'function/DomesticHotWater' in self.status:
+                dhw_states = self.status['function/DomesticHotWater']['states']
+                if 'InstallerState' in dhw_states:
+                    state = state | dhw_states['InstallerState']
+            else:
+                state = False
+
+            if 'function/SpaceHeating' in self.status:
+                sh_states = self.status['function/SpaceHeating']['states']
+                if 'InstallerState' in sh_states:
+                    state = state | sh_states['InstallerState']
+
+            return state
+        return None
+
+    def subscribe(self, callback: Callable[[dict], None], changes_only: bool = False) -> Callable[[], None]:
+        """
+        Calls callback with every new status snapshot, or only with the changed key paths
+        (for example "function/SpaceHeating/sensors/OutdoorTemperature") and their values, None for a removed
+        value. It is called on the event loop after the update, so it must not block. Consumers share the updates
+        of the integration and cause no additional requests to the adapter.
+        @return: function which removes the callback
+        """
+        return self._stream.subscribe(callback, changes_only)
+
+    def snapshots(self, changes_only: bool = False) -> StatusIterator:
+        """
+        Iterator over every new status snapshot, or only the changed key paths, like subscribe:
+
+            snapshots = api.snapshots(changes_only=True)
+            try:
+                async for changes in snapshots:
+                    ...
+            finally:
+                await snapshots.aclose()
+
+        It receives the updates from its creation on. A consumer which is slower than the updates gets the latest
+        snapshot, or all the changes since its last iteration merged, instead of a queue of them.
+        """
+        return self._stream.iterate(changes_only)
+
+    async def refresh_unit(self):
+        """Reads the unit profiles again and rebuilds the resource index from them once they are read."""
+        try:
+            await self.device.refresh()
+        except AlthermaException:
+            _LOGGER.warning('Failed to read the unit profiles again, the previous profiles are kept.', exc_info=True)
+            return
+        self._resources = {}
+
+    async def async_update(self):
+        """Pull the latest data of all the units from Daikin."""
+        await self.async_update_units(list(self._device.altherma_units))
+
+    async def async_update_units(self, unit_functions: list):
+        """
+        Pull the latest data of the unit functions from Daikin.
+        The update channels limit how often it is called, so it always reads the adapter. Units which are
+        being fetched already are not read again, the caller waits for the fetch in progress instead.
+        """
+        pending = {self._in_flight[unit_function] for unit_function in unit_functions
+                   if unit_function in self._in_flight}
+        if pending:
+            self._metrics.record_deduplicated()
+        fetch = [unit_function for unit_function in unit_functions if unit_function not in self._in_flight]
+        if fetch:
+            task = asyncio.get_running_loop().create_task(self._async_update_units(fetch))
+            for unit_function in fetch:
+                self._in_flight[unit_function] = task
+            task.add_done_callback(lambda _: self._fetch_done(fetch, task))
+            pending.add(task)
+        # A cancelled caller must not cancel the fetch the other callers wait for
+        await asyncio.gather(*(asyncio.shield(task) for task in pending))
+
+    async def async_cancel_updates(self):
+        """Cancels the fetches in progress, for example when the config entry is unloaded."""
+        tasks = set(self._in_flight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _fetch_done(self, unit_functions: list, task):
+        for unit_function in unit_functions:
+            if self._in_flight.get(unit_function) is task:
+                del self._in_flight[unit_function]
+
+    async def _async_update_units(self, unit_functions: list):
+        started = time.monotonic()
+        try:
+            # The fetch is shared by the callers, so it has a deadline of its own
+            async with async_timeout.timeout(self.update_timeout):
+                prev_installer_state = self.get_state('InstallerState')
+                unit_status = {}
+                for unit_function in unit_functions:
+                    unit_status[unit_function] = await self._async_read_unit(unit_function, started)
+                # Other channels may have updated their units in the meantime
+                previous = self._status
+                status = {**(previous or {}), **unit_status}
+                self._status = status
+                if self._stream.has_consumers:
+                    self._stream.publish(previous, status, unit_functions)
+                if 'function/SpaceHeating' in unit_functions:
+                    # Power is one of the operations, so it does not need a request of its own
+                    operations = status['function/SpaceHeating'].get('operations', {})
+                    self._climate_control_powered = operations.get('Power') == 'on'
+                installer_state = self.get_state('InstallerState')
+                if prev_installer_state is not None and prev_installer_state != installer_state and installer_state is False:
+                    # Leaving installer mode can have changes which may not be refreshed properly
+                    # For example from fixed temperature to weather dependent are read from profile during initialization
+                    # and it should update the profile after installer state
+                    _LOGGER.warning(
+                        'Unit left installer state. If there are heavy changes it is probably better to reload integration. Currently it may not fully incorporate new settings.')
+
+                    await self.refresh_unit()
+
+                await self.async_release_connection()
+
+                if not self._available:
+                    _LOGGER.info('Daikin became available again.')
+                if self._failing_since is not None:
+                    self._metrics.record_flap()
+
+                self._available = True
+                self._stale = False
+                self._unconfirmed = False
+                self._failing_since = None
+                self._failed_updates = 0
+                self._type_error_failure = 0
+                self._metrics.record_poll(started, success=True)
+                self._timeouts.record(POLL, time.monotonic() - started)
+        except TypeError as e:
+            self._metrics.record_poll(started, success=False)
+            # Report only once
+            self._type_error_failure += 1
+            if self._type_error_failure < 2:
+                _LOGGER.error(f'Failed to update the device status with error {e}', e)
+
+        except (ClientConnectionError, ServerTimeoutError, CancelledError, asyncio.TimeoutError) as error:
+            if isinstance(error, CancelledError) and asyncio.current_task().cancelling():
+                # Cancelled by async_cancel_updates, not a failed update
+                raise
+            self._metrics.record_poll(started, success=False)
+            if self._tolerate_failure():
+                _LOGGER.debug(f'Update {self._failed_updates} of {self._max_update_failed} tolerated failed ({error})')
+            else:
+                if self._available:
+                    # report only once
+                    _LOGGER.error(f"Failed to the get the data from the device [{self.host}] ({error})", exc_info=True)
+                self._available = False
+        except:
+            self._metrics.record_poll(started, success=False)
+            if self._tolerate_failure():
+                _LOGGER.debug(f'Update {self._failed_updates} failed within the grace period', exc_info=True)
+            else:
+                if self._available:
+                    _LOGGER.error(f'Something went wrong while updating data from the device', exc_info=True)
+                self._available = False
+
+    def _tolerate_failure(self) -> bool:
+        """
+        Counts a failed update.
+        @return: True if the entities stay available with the last status, marked stale. That is the case while the
+        status restored from storage was never confirmed by the adapter, within max_update_failed failed updates in
+        a row or within the grace period since the first of them.
+        """
+        now = time.monotonic()
+        if self._failing_since is None:
+            self._failing_since = now
+        self._failed_updates += 1
+        tolerated = self._available and (
+            self._stale
+            or self._failed_updates <= self._max_update_failed
+            or now - self._failing_since < self._unavailable_grace
+        )
+        self._unconfirmed = tolerated
+        return tolerated
+
+    async def _async_read_unit(self, unit_function: str, started: float) -> dict:
+        """
+        Reads the status of a unit. The consumption is read again once the consumption interval passed.
+        A resource without a valid response keeps its previous value and is reported in missing_resources.
+        """
+        previous = (self._status or {}).get(unit_function)
+        last_consumption = self._consumption_updated.get(unit_function)
+        read_consumption = (previous is None or last_consumption is None
+                            or started - last_consumption >= self._consumption_interval)
+        unit_status = {
+            'sensors': {},
+            'operations': {},
+            'states': {},
+            'consumption': previous['consumption'] if previous is not None else {},
+        }
+        missing = []
+        for resource in self._resource_index(unit_function):
+            if resource.section == 'consumption' and not read_consumption:
+                continue
+            outcome, value = await self._async_read_resource(resource)
+            if outcome == INVALID:
+                missing.append(resource.dest)
+            if outcome in (INVALID, UNKNOWN):
+                value = _previous_value(previous, resource)
+            if resource.key is None:
+                unit_status[resource.section] = value
+            else:
+                unit_status[resource.section][resource.key] = value
+        if read_consumption:
+            self._consumption_updated[unit_function] = started
+        if missing:
+            _LOGGER.debug(f'No valid response for {missing}, the previous values are kept')
+        self._missing[unit_function] = missing
+        return unit_status
+
+    async def _async_read_resource(self, resource: UnitResource) -> tuple:
+        """Reads a resource, an incomplete response is read again up to RESOURCE_RETRIES times."""
+        connection = self._device.ws_connection
+        outcome, value = decode_response(resource, await connection.request(resource.dest))
+        for _ in range(RESOURCE_RETRIES):
+            if outcome != INVALID:
+                break
+            self._metrics.record_retry()
+            outcome, value = decode_response(resource, await connection.request(resource.dest))
+        if outcome == ABSENT:
+            value = resource.default
+        return outcome, value
+
+    def _resource_index(self, unit_function: str) -> list:
+        resources = self._resources.get(unit_function)
+        if resources is None:
+            resources = self._resources[unit_function] = build_resource_index(
+                self._device.altherma_units[unit_function])
+        return resources
+
+    @property
+    def missing_resources(self) -> dict:
+        """Resources per unit function without a valid response in the last update of the unit."""
+        return {unit_function: missing for unit_function, missing in self._missing.items() if missing}
+
+    @property
+    def available(self) -> bool:
+        """Return True if entity is available."""
+        return self._available
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        return DeviceInfo(
+            **{
+                "identifiers": {(DOMAIN, self._info["serial_number"])},
+                "name": self._info["duty"],
+                "manufacturer": self._info["manufacturer"],
+                "model": self._info["model_name"],
+                "sw_version": self._info["firmware"],
+            }
+        )
+
+    async def get_HWT_device_info(self) -> DeviceInfo:
+        if self._hwt_device_info is None:
+            hwt = self.device.hot_water_tank
+            if hwt is None:
+                return None
+
+            self._hwt_device_info = self._unit_device_info(
+                'Hot Water Tank',
+                model=await hwt.model_number,
+                sw_version=f"{await hwt.indoor_software}/{await hwt.outdoor_software}",
+            )
+        return self._hwt_device_info
+
+    async def get_space_heating_device_info(self) -> DeviceInfo:
+        if self._space_heating_device_info is None:
+            space_heating = self.device.climate_control
+            if space_heating is None:
+                return None
+
+            self._space_heating_device_info = self._unit_device_info(
+                'Space Heating',
+                model=await space_heating.model_number,
+                sw_version=f"{await space_heating.indoor_software}/{await space_heating.outdoor_software}",
+            )
+        return self._space_heating_device_info
+
+    def unit_device_info(self, unit_function: str) -> DeviceInfo:
+        """Device of the unit function, units other than the hot water tank belong to space heating."""
+        hwt = self.device.hot_water_tank
+        if hwt is not None and unit_function == hwt.unit_function:
+            return self._hwt_device_info
+        return self._space_heating_device_info
+
+    def _unit_device_info(self, name: str, model, sw_version) -> DeviceInfo:
+        return DeviceInfo(
+            **{
+                "identifiers": {(DOMAIN, f"{self._info['serial_number']} {name}")},
+                "name": name,
+                "manufacturer": self._info["manufacturer"],
+                "model": model,
+                "sw_version": sw_version,
+            }
+        )
+
+    @property
+    def HWT_device_info(self):
+        return self._hwt_device_info
+
+    @property
+    def space_heating_device_info(self):
+        return self._space_heating_device_info
+
+    @property
+    def water_tank_operation(self):
+        from homeassistant.components.water_heater import STATE_PERFORMANCE
+
+        status = self.water_tank_status
+        ops = status["operations"]
+        is_on = ops["Power"] == "on"
+        # First check if it is on and if yes then check whatever it is in powerful mode
+        if is_on:
+            if 'powerful' in ops:
+                state = ops["powerful"]
+            else:
+                state = 0
+
+            if state == 0:
+                return STATE_ON
+            else:
+                return STATE_PERFORMANCE
+        else:
+            return STATE_OFF
+
+    def hwt_powerful_support(self):
+        device = self.device
+        if device.hot_water_tank is None:
+            return False
+        powerful_support = 'powerful' in [x.lower() for x in device.hot_water_tank.operations]
+        return powerful_support
+
+    async def async_set_water_tank_state(self, state):
+        """
+        Sets new hot water tank state. It can be off / on / powerful
+        @param state: string
+        @return: Nothing
+        """
+        if state == STATE_OFF:
+            if self.hwt_powerful_support():
+                await self.device.hot_water_tank.set_powerful(False)
+            await self.device.hot_water_tank.turn_off()
+        elif state == STATE_ON:
+            await self.device.hot_water_tank.turn_on()
+            if self.hwt_powerful_support():
+                await self.device.hot_water_tank.set_powerful(False)
+        else:
+            await self.device.hot_water_tank.turn_on()
+
+            if self.hwt_powerful_support():
+                await self.device.hot_water_tank.set_powerful(True)
+        await self.async_release_connection()
+
+    @property
+    def water_tank_target_temp_config(self) -> dict:
+        """
+        Returns the configuration values for target temperature.
+        Normally it should have the maximum, minimum and step numbers
+        @rtype: dict
+        """
+
+        if "DomesticHotWaterTemperatureHeating" in self.device.hot_water_tank._unit.operation_config:
+            return self.device.hot_water_tank._unit.operation_config["DomesticHotWaterTemperatureHeating"]
+
+        if "TargetTemperature" in self.device.hot_water_tank._unit.operation_config:
+            return self.device.hot_water_tank._unit.operation_config["TargetTemperature"][
+                "heating"
+            ]
+        return {}
+
+
+def _previous_value(previous: dict | None, resource: UnitResource):
+    if previous is None:
+        return resource.default
+    if resource.key is None:
+        return previous.get(resource.section, resource.default)
+    return previous.get(resource.section, {}).get(resource.key, resource.default)
@@ -1,10 +1,9 @@
 import logging
 from homeassistant.components.binary_sensor import BinarySensorEntity, BinarySensorDeviceClass
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
-)
 
-from . import DOMAIN, AlthermaAPI
+from .api import AlthermaAPI
+from .const import DOMAIN
+from .entity import AlthermaEntity
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -12,11 +11,10 @@ _LOGGER = logging.getLogger(__name__)
 async def async_setup_entry(hass, entry, async_add_entities):
     """Set up Daikin climate based on config_entry."""
     api = hass.data[DOMAIN].get(entry.entry_id)
-    coordinator = hass.data[DOMAIN]['coordinator']
     entities = []
     if api.space_heating_device_info is not None:
         entities.append(AlthermaUnitProblemSensor(
-            coordinator, api, 'Space Heating Unit State',
+            api.channel('function/SpaceHeating'), api, 'Space Heating Unit State',
             api.space_heating_device_info,
             'SpaceHeating'))
 
@@ -25,7 +23,7 @@ async def async_setup_entry(hass, entry, async_add_entities):
         unit_function = hwt.unit_function
         unit_ref = unit_function.split('/')[1]
         entities.append(AlthermaUnitProblemSensor(
-            coordinator, api, 'Hot Water Tank State',
+            api.channel(unit_function), api, 'Hot Water Tank State',
             api.HWT_device_info,
             # 'DomesticHotWaterTank'
             unit_ref
@@ -33,28 +31,20 @@ async def async_setup_entry(hass, entry, async_add_entities):
     async_add_entities(entities, update_before_add=False)
 
 
-class AlthermaUnitProblemSensor(BinarySensorEntity, CoordinatorEntity):
+class AlthermaUnitProblemSensor(BinarySensorEntity, AlthermaEntity):
     _attr_device_class = BinarySensorDeviceClass.PROBLEM
 
     def __init__(
             self, coordinator, api: AlthermaAPI,
             name: str, device_info, unit_ref
     ):
-        super().__init__(coordinator)
-        self._api = api
+        super().__init__(coordinator, api)
         self._attr_name = name
         self._attr_device_info = device_info
         self._attr_unique_id = f"{self._api.info['serial_number']}-{unit_ref}-problem_sensor"
         self._state = None
         self._unit_ref = unit_ref
 
-    @property
-    def device_info(self):
-        return self._attr_device_info
-
-    async def async_update(self):
-        await self._api.async_update()
-
     @property
     def is_on(self):
         return self._is_problem_state()
@@ -69,9 +59,5 @@ class AlthermaUnitProblemSensor(BinarySensorEntity, CoordinatorEntity):
         return sum(values) > 0
 
     @property
-    def extra_state_attributes(self):
+    def unit_state_attributes(self):
         return self._api.status[f"function/{self._unit_ref}"]['states']
-
-    @property
-    def available(self):
-        return self._api.available
@@ -3,19 +3,25 @@
 from __future__ import annotations
 
 import asyncio
+import ipaddress
 import logging
 import voluptuous as vol
 from aiohttp import ClientError
 from async_timeout import timeout
 from homeassistant import config_entries
+from homeassistant.components import network
 from homeassistant.const import CONF_HOST
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.helpers.typing import DiscoveryInfoType
-from pyaltherma.comm import DaikinWSConnection
-from pyaltherma.controllers import AlthermaController
 from typing import Any
 
-from .const import DOMAIN, TIMEOUT
+from .const import DOMAIN, TIMEOUT, CONF_NETWORK, DEFAULT_OPTIONS, CONF_UPDATE_INTERVAL, CONF_MIN_TIME_BETWEEN_UPDATES, \
+    CONF_CONSUMPTION_INTERVAL, CONF_UPDATE_TIMEOUT, CONF_REQUEST_TIMEOUT, CONF_KEEP_CONNECTION, CONF_MAX_UPDATE_FAILED, \
+    CONF_HOT_WATER_TANK_UPDATE_INTERVAL, CONF_UNAVAILABLE_GRACE, CONF_TEMPERATURE_DEADBAND, CONF_TEMPERATURE_HEARTBEAT
+from .connection import AlthermaConnection
+from .controller import AlthermaDeviceController
+from .scanner import async_scan, async_get_probe_cache
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -26,6 +32,13 @@ class DaikinAlthermaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     def __init__(self):
         self.device_info: dict = None
         self.host: str | None = None
+        self.network: str | None = None
+        self.found: dict = {}
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> config_entries.OptionsFlow:
+        return DaikinAlthermaOptionsFlow(config_entry)
 
     @property
     def schema(self):
@@ -38,17 +51,22 @@ class DaikinAlthermaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     async def async_step_user(
             self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        return self.async_show_menu(step_id="user", menu_options=["manual", "scan"])
+
+    async def async_step_manual(
+            self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
         errors = {}
         if user_input is not None:
             try:
                 with timeout(TIMEOUT):
                     self.host = user_input[CONF_HOST]
-                    conn = DaikinWSConnection(
+                    conn = AlthermaConnection(
                         self.hass.helpers.aiohttp_client.async_get_clientsession(),
                         self.host,
                     )
-                    device = AlthermaController(conn)
+                    device = AlthermaDeviceController(conn)
                     await device.discover_units()
                     self.device_info = await device.device_info()
                     await conn.close()
@@ -61,25 +79,77 @@ class DaikinAlthermaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             except (asyncio.TimeoutError, ClientError):
                 errors["base"] = "cannot_connect"
         return self.async_show_form(
-            step_id="user", data_schema=self.schema, errors=errors
+            step_id="manual", data_schema=self.schema, errors=errors
+        )
+
+    async def async_step_scan(
+            self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Scan a network range for adapters, for networks where mDNS does not reach Home Assistant."""
+        errors = {}
+        if user_input is not None:
+            self.network = user_input[CONF_NETWORK]
+            try:
+                found = await async_scan(
+                    self.hass.helpers.aiohttp_client.async_get_clientsession(), self.network
+                )
+            except ValueError:
+                errors["base"] = "invalid_network"
+            else:
+                configured = self._async_current_ids()
+                self.found = {
+                    info["host"]: info for info in found if info["serial_number"] not in configured
+                }
+                if self.found:
+                    return await self.async_step_scan_result()
+                errors["base"] = "no_devices_found"
+        elif self.network is None:
+            self.network = await self._async_default_network()
+
+        return self.async_show_form(
+            step_id="scan",
+            data_schema=vol.Schema({vol.Required(CONF_NETWORK, default=self.network or ""): str}),
+            errors=errors,
         )
 
+    async def async_step_scan_result(
+            self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        if user_input is not None:
+            self.host = user_input[CONF_HOST]
+            self.device_info = self.found[self.host]
+            await self.async_set_unique_id(self.device_info["serial_number"])
+            self._abort_if_unique_id_configured()
+            title = f"{self.device_info['manufacturer']} {self.device_info['duty']} ({self.device_info['serial_number']})"
+            return self.async_create_entry(title=title, data={CONF_HOST: self.host})
+
+        hosts = {
+            host: f"{info['manufacturer']} {info['duty']} ({info['serial_number']}) {host}"
+            for host, info in self.found.items()
+        }
+        return self.async_show_form(
+            step_id="scan_result", data_schema=vol.Schema({vol.Required(CONF_HOST): vol.In(hosts)})
+        )
+
+    async def _async_default_network(self) -> str | None:
+        """The /24 network of Home Assistant, which is where the adapter usually is."""
+        try:
+            source_ip = await network.async_get_source_ip(self.hass)
+        except Exception:
+            _LOGGER.debug("Failed to get the address of Home Assistant", exc_info=True)
+            return None
+        return str(ipaddress.ip_network(f"{source_ip}/24", strict=False))
+
     async def async_step_zeroconf(
             self, discovery_info: DiscoveryInfoType
     ) -> FlowResult:
         self.host = discovery_info.host
         self._async_abort_entries_match({CONF_HOST: self.host})
-        try:
-            with timeout(TIMEOUT):
-                conn = DaikinWSConnection(
-                    self.hass.helpers.aiohttp_client.async_get_clientsession(),
-                    self.host,
-                )
-                device = AlthermaController(conn)
-                await device.discover_units()
-                self.device_info = await device.device_info()
-                await conn.close()
-        except (asyncio.TimeoutError, ClientError):
+        # Only the serial number is needed to reject configured adapters, the units are discovered on setup
+        self.device_info = await async_get_probe_cache(self.hass).async_probe(
+            self.hass.helpers.aiohttp_client.async_get_clientsession(), self.host
+        )
+        if self.device_info is None:
             return self.async_abort(reason="cannot_connect")
 
         await self.async_set_unique_id(self.device_info["serial_number"])
@@ -96,3 +166,43 @@ class DaikinAlthermaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         return self.async_show_form(
             step_id="zeroconf_confirm", description_placeholders=self.device_info
         )
+
+
+class DaikinAlthermaOptionsFlow(config_entries.OptionsFlow):
+    """Polling and connection options, applied to the running integration without a reload."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry):
+        self.config_entry = config_entry
+
+    async def async_step_init(
+            self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = {**DEFAULT_OPTIONS, **self.config_entry.options}
+        seconds = vol.All(vol.Coerce(int), vol.Range(min=1, max=3600))
+        timeout_seconds = vol.All(vol.Coerce(float), vol.Range(min=0, max=TIMEOUT))
+        schema = vol.Schema(
+            {
+                vol.Required(CONF_UPDATE_INTERVAL, default=options[CONF_UPDATE_INTERVAL]): seconds,
+                vol.Required(CONF_HOT_WATER_TANK_UPDATE_INTERVAL,
+                             default=options[CONF_HOT_WATER_TANK_UPDATE_INTERVAL]):
+                    vol.All(vol.Coerce(int), vol.Range(min=0, max=3600)),
+                vol.Required(CONF_MIN_TIME_BETWEEN_UPDATES, default=options[CONF_MIN_TIME_BETWEEN_UPDATES]): seconds,
+                vol.Required(CONF_CONSUMPTION_INTERVAL, default=options[CONF_CONSUMPTION_INTERVAL]):
+                    vol.All(vol.Coerce(int), vol.Range(min=0, max=86400)),
+                vol.Required(CONF_UPDATE_TIMEOUT, default=options[CONF_UPDATE_TIMEOUT]): timeout_seconds,
+                vol.Required(CONF_REQUEST_TIMEOUT, default=options[CONF_REQUEST_TIMEOUT]): timeout_seconds,
+                vol.Required(CONF_KEEP_CONNECTION, default=options[CONF_KEEP_CONNECTION]): bool,
+                vol.Required(CONF_MAX_UPDATE_FAILED, default=options[CONF_MAX_UPDATE_FAILED]):
+                    vol.All(vol.Coerce(int), vol.Range(min=0, max=100)),
+                vol.Required(CONF_UNAVAILABLE_GRACE, default=options[CONF_UNAVAILABLE_GRACE]):
+                    vol.All(vol.Coerce(int), vol.Range(min=0, max=86400)),
+                vol.Required(CONF_TEMPERATURE_DEADBAND, default=options[CONF_TEMPERATURE_DEADBAND]):
+                    vol.All(vol.Coerce(float), vol.Range(min=0, max=5)),
+                vol.Required(CONF_TEMPERATURE_HEARTBEAT, default=options[CONF_TEMPERATURE_HEARTBEAT]):
+                    vol.All(vol.Coerce(int), vol.Range(min=0, max=86400)),
+            }
+        )
+        return self.async_show_form(step_id="init", data_schema=schema)
@@ -0,0 +1,114 @@
+"""Websocket connection to the Daikin Altherma adapter."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+
+import async_timeout
+from pyaltherma.comm import DaikinWSConnection
+from pyaltherma.proto import Request
+
+from .metrics import AdapterMetrics
+from .timeouts import AdaptiveTimeouts, CONNECT, READ, COMMAND, DISCOVERY
+from .unsupported import UnsupportedResources, not_found_response
+
+_LOGGER = logging.getLogger(__name__)
+
+# Responses larger than this (unit profiles) are decoded in the executor
+LARGE_RESPONSE_SIZE = 8192
+
+
+class AlthermaConnection(DaikinWSConnection):
+    """
+    DaikinWSConnection which records requests, commands and reconnects in the adapter metrics.
+    Requests time out after the adaptive timeout of their operation class, unless a fixed timeout is given.
+    Large responses are decoded in the executor. With a recorder every exchange is written to a capture.
+    Reads of resources which the adapter does not support are answered with not found without a request.
+    """
+
+    def __init__(self, session, host, timeout=None, metrics: AdapterMetrics = None,
+                 timeouts: AdaptiveTimeouts = None, recorder=None, unsupported: UnsupportedResources = None):
+        super().__init__(session, host, timeout)
+        self.metrics = metrics if metrics is not None else AdapterMetrics()
+        self.timeouts = timeouts if timeouts is not None else AdaptiveTimeouts()
+        self.unsupported = unsupported if unsupported is not None else UnsupportedResources()
+        self.recorder = recorder
+        self._closing = set()
+
+    def _timeout_of(self, operation_class: str) -> float:
+        if self._timeout is not None:
+            return self._timeout
+        return self.timeouts.timeout(operation_class)
+
+    async def connect(self):
+        started = time.monotonic()
+        async with async_timeout.timeout(self._timeout_of(CONNECT)):
+            await super().connect()
+        self.timeouts.record(CONNECT, time.monotonic() - started)
+        self.metrics.record_connect()
+
+    async def close(self):
+        async with self._lock:
+            if self._client is not None:
+                await self._client.close()
+
+    async def request(self, dest, payload=None, wait_for_response=True, assert_response_fn=None):
+        if payload is None and self.unsupported.skip(dest):
+            return not_found_response(dest)
+        self.metrics.record_request()
+        if payload is not None:
+            self.metrics.record_command()
+        response = await super().request(dest, payload, wait_for_response, assert_response_fn)
+        if payload is None:
+            self.unsupported.record(dest, response)
+        return response
+
+    async def _request(self, dest, payload=None, wait_for_response=True, assert_response_fn=None):
+        if self._client is None or self._client.closed:
+            await self.connect()
+
+        data = Request(dest, payload).serialize()
+        _LOGGER.debug(f"[OUT]: {dest} {data}")
+        started = time.monotonic()
+        await self._client.send_str(data)
+        if not wait_for_response:
+            if self.recorder is not None:
+                self.recorder.record(started, time.monotonic() - started, dest, payload, None)
+            return None
+
+        operation_class = _operation_class(dest, payload)
+        try:
+            response_str = await self._client.receive_str(timeout=self._timeout_of(operation_class))
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            # A late response would be taken as the response of the next request
+            self._drop_client()
+            raise
+        latency = time.monotonic() - started
+        self.timeouts.record(operation_class, latency)
+        _LOGGER.debug(f"[IN]: {response_str}")
+        if len(response_str) > LARGE_RESPONSE_SIZE:
+            response = await asyncio.get_running_loop().run_in_executor(None, json.loads, response_str)
+        else:
+            response = json.loads(response_str)
+        if self.recorder is not None:
+            self.recorder.record(started, latency, dest, payload, response)
+        if callable(assert_response_fn):
+            assert_response_fn(response)
+        return response
+
+    def _drop_client(self):
+        client, self._client = self._client, None
+        # Closing waits for the adapter, so it must not delay the failed request
+        task = asyncio.get_running_loop().create_task(client.close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+
+def _operation_class(dest: str, payload) -> str:
+    if payload is not None:
+        return COMMAND
+    if 'UnitProfile' in dest:
+        return DISCOVERY
+    return READ
@@ -5,4 +5,88 @@ TIMEOUT = 60
 MIN_TIME_BETWEEN_UPDATES_SECONDS = 5
 UPDATE_INTERVAL_SECONDS = 2
 ASYNC_UPDATE_TIMEOUT_SECONDS = 10
+# Failed updates in a row which are tolerated before the entities become unavailable
 MAX_UPDATE_FAILED = 0
+# Seconds after the first of failed updates in a row during which the entities stay available with the last status
+UNAVAILABLE_GRACE_SECONDS = 0
+# A temperature within the deadband is published anyway once this long passed since the last published one
+TEMPERATURE_HEARTBEAT_SECONDS = 900
+# Consumption is read with every status update by default
+CONSUMPTION_UPDATE_INTERVAL_SECONDS = 0
+
+SERVICE_PROFILE = "profile"
+ATTR_CYCLES = "cycles"
+DEFAULT_PROFILE_CYCLES = 5
+PROFILE_REPORT_LINES = 50
+
+SERVICE_CONSUMPTION_HISTORY = "consumption_history"
+ATTR_ENTRY_ID = "entry_id"
+ATTR_UNIT_FUNCTION = "unit_function"
+ATTR_CONSUMPTION_TYPE = "consumption_type"
+ATTR_ACTION = "action"
+ATTR_RESOLUTION = "resolution"
+ATTR_START = "start"
+ATTR_END = "end"
+HISTORY_SAVE_DELAY_SECONDS = 600
+
+ATTR_STALE = "stale"
+STATUS_SAVE_INTERVAL_SECONDS = 300
+
+# Adaptive timeouts: (default, floor, ceiling) per operation class
+TIMEOUT_LIMITS_SECONDS = {
+    "connect": (10, 2, 30),
+    "read": (10, 1, 30),
+    "command": (10, 2, 30),
+    "discovery": (30, 5, TIMEOUT),
+    "poll": (ASYNC_UPDATE_TIMEOUT_SECONDS, 3, TIMEOUT),
+}
+TIMEOUT_PERCENTILE = 99
+TIMEOUT_MULTIPLIER = 3
+TIMEOUT_MIN_SAMPLES = 20
+TIMEOUT_SAMPLES = 200
+
+CONF_NETWORK = "network"
+SCAN_CONCURRENCY = 64
+SCAN_CONNECT_TIMEOUT_SECONDS = 1
+SCAN_RESPONSE_TIMEOUT_SECONDS = 2
+SCAN_MAX_HOSTS = 1024
+# Values of the adapter info which identify the adapter, redacted from the diagnostics and anonymized in dumps
+IDENTIFYING_DEVICE_INFO = {"serial_number", "miconID"}
+# Adapters announce themselves often, an adapter which answered a probe is not probed again for this long
+PROBE_CACHE_TTL_SECONDS = 300
+
+CONF_UPDATE_INTERVAL = "update_interval"
+CONF_HOT_WATER_TANK_UPDATE_INTERVAL = "hot_water_tank_update_interval"
+CONF_MIN_TIME_BETWEEN_UPDATES = "min_time_between_updates"
+CONF_CONSUMPTION_INTERVAL = "consumption_interval"
+CONF_UPDATE_TIMEOUT = "update_timeout"
+CONF_REQUEST_TIMEOUT = "request_timeout"
+CONF_KEEP_CONNECTION = "keep_connection"
+CONF_MAX_UPDATE_FAILED = "max_update_failed"
+CONF_UNAVAILABLE_GRACE = "unavailable_grace"
+CONF_TEMPERATURE_DEADBAND = "temperature_deadband"
+CONF_TEMPERATURE_HEARTBEAT = "temperature_heartbeat"
+# Options of a config entry, a timeout of 0 means the timeout learned from the adapter latency
+DEFAULT_OPTIONS = {
+    CONF_UPDATE_INTERVAL: UPDATE_INTERVAL_SECONDS,
+    CONF_HOT_WATER_TANK_UPDATE_INTERVAL: 0,
+    CONF_MIN_TIME_BETWEEN_UPDATES: MIN_TIME_BETWEEN_UPDATES_SECONDS,
+    CONF_CONSUMPTION_INTERVAL: CONSUMPTION_UPDATE_INTERVAL_SECONDS,
+    CONF_UPDATE_TIMEOUT: 0,
+    CONF_REQUEST_TIMEOUT: 0,
+    CONF_KEEP_CONNECTION: False,
+    CONF_MAX_UPDATE_FAILED: MAX_UPDATE_FAILED,
+    CONF_UNAVAILABLE_GRACE: UNAVAILABLE_GRACE_SECONDS,
+    CONF_TEMPERATURE_DEADBAND: 0,
+    CONF_TEMPERATURE_HEARTBEAT: TEMPERATURE_HEARTBEAT_SECONDS,
+}
+# Option with the update interval of a unit function, 0 means the update interval option
+UNIT_UPDATE_INTERVAL_OPTIONS = {
+    "function/DomesticHotWaterTank": CONF_HOT_WATER_TANK_UPDATE_INTERVAL,
+    "function/DomesticHotWater": CONF_HOT_WATER_TANK_UPDATE_INTERVAL,
+}
+# Reads of a resource with an incomplete response which are repeated within the same update
+RESOURCE_RETRIES = 1
+
+# Resources which the adapter does not support are requested again after this long
+UNSUPPORTED_RETRY_SECONDS = 3600
@@ -0,0 +1,183 @@
+"""Cumulative energy meter built from the consumption buckets of the adapter."""
+from __future__ import annotations
+
+import logging
+from datetime import date, datetime, tzinfo
+
+_LOGGER = logging.getLogger(__name__)
+
+# The daily consumption ('D') holds 12 two hour buckets of yesterday followed by 12 of today
+BUCKETS_PER_DAY = 12
+BUCKET_HOURS = 24 // BUCKETS_PER_DAY
+
+# Number of buckets of each resolution: 2 hours of yesterday and today, days of the last and this week,
+# months of the last and this year
+WINDOW_SIZE = {'D': 2 * BUCKETS_PER_DAY, 'W': 14, 'M': 24}
+
+
+def bucket_of(resolution: str, moment: datetime) -> int:
+    """
+    Number of the bucket which contains the local time. Two hour buckets are counted since 0001-01-01,
+    days are date ordinals and months are counted since the year 0.
+    """
+    if resolution == 'D':
+        return moment.date().toordinal() * BUCKETS_PER_DAY + moment.hour // BUCKET_HOURS
+    if resolution == 'W':
+        return moment.date().toordinal()
+    return moment.year * 12 + moment.month - 1
+
+
+def bucket_start(resolution: str, bucket: int, tz: tzinfo) -> datetime:
+    if resolution == 'D':
+        day = date.fromordinal(bucket // BUCKETS_PER_DAY)
+        return datetime(day.year, day.month, day.day, (bucket % BUCKETS_PER_DAY) * BUCKET_HOURS, tzinfo=tz)
+    if resolution == 'W':
+        day = date.fromordinal(bucket)
+        return datetime(day.year, day.month, day.day, tzinfo=tz)
+    return datetime(bucket // 12, bucket % 12 + 1, 1, tzinfo=tz)
+
+
+def _window_starts(resolution: str, now: datetime) -> list:
+    """Bucket numbers of the first element of the window of the current, the previous and the next period."""
+    if resolution == 'D':
+        today = now.date().toordinal()
+        return [(day - 1) * BUCKETS_PER_DAY for day in (today, today - 1, today + 1)]
+    if resolution == 'W':
+        monday = now.date().toordinal() - now.weekday()
+        return [week - 7 for week in (monday, monday - 7, monday + 7)]
+    return [(year - 1) * 12 for year in (now.year, now.year - 1, now.year + 1)]
+
+
+def _last_index(values: list):
+    for idx in range(len(values) - 1, -1, -1):
+        if values[idx] is not None:
+            return idx
+    return None
+
+
+def locate(resolution: str, values: list, now: datetime):
+    """
+    Finds the bucket numbers of the consumption values of the adapter.
+    The last value which is not None belongs to the bucket in progress, all the values before it are finished.
+    @return: (bucket number of the first value, index of the bucket in progress) or None if they do not match now
+    """
+    if values is None or len(values) != WINDOW_SIZE.get(resolution):
+        return None
+    current_idx = _last_index(values)
+    if current_idx is None:
+        return None
+    expected = bucket_of(resolution, now)
+    # Around the end of a period the adapter may roll over a little before or after us
+    for first_bucket in _window_starts(resolution, now):
+        if abs(first_bucket + current_idx - expected) <= 1:
+            return first_bucket, current_idx
+    _LOGGER.debug(f'Consumption bucket {current_idx} ({resolution}) does not match the time {now}, '
+                  f'the adapter clock is off')
+    return None
+
+
+# Aggregates of the consumption arrays: period -> (resolution, first index, end index) of a sum, or
+# (resolution, None, None) of the value of the bucket which contains now
+AGGREGATE_PERIODS = {
+    'today': ('D', BUCKETS_PER_DAY, 2 * BUCKETS_PER_DAY),
+    'yesterday': ('D', 0, BUCKETS_PER_DAY),
+    'this_week': ('W', 7, 14),
+    'this_month': ('M', None, None),
+}
+SHARE_PERIOD = 'today'
+
+
+def _aggregate(values: list, resolution: str, first: int | None, end: int | None, now: datetime):
+    if values is None or len(values) != WINDOW_SIZE[resolution]:
+        return None
+    if first is None:
+        return _current_value(values, resolution, now)
+    known = [value for value in values[first:end] if value is not None]
+    if not known:
+        return None
+    return round(sum(known), 3)
+
+
+def _current_value(values: list, resolution: str, now: datetime):
+    """
+    Value of the bucket which contains now, 0 if the adapter has not written it yet, for example at the start of
+    a month or of a year before the adapter moved its window. None if the values do not match now.
+    """
+    located = locate(resolution, values, now)
+    if located is None:
+        return None
+    idx = bucket_of(resolution, now) - located[0]
+    if idx == len(values):
+        return 0
+    if not 0 <= idx < len(values):
+        return None
+    return round(values[idx], 3) if values[idx] is not None else 0
+
+
+def aggregate_consumption(status: dict, now: datetime) -> dict:
+    """
+    Consumption of every unit function, consumption type and action in the periods of AGGREGATE_PERIODS,
+    and its share of all the consumption of the type today in percent ('share_today').
+    @param status: unit function -> unit status
+    @param now: local time, used to find the bucket of the current month
+    @return: (unit function, consumption type, action) -> period -> value or None
+    """
+    aggregates = {}
+    for unit_function, unit_status in status.items():
+        for consumption_type, actions in ((unit_status or {}).get('consumption') or {}).items():
+            for action, contents in (actions or {}).items():
+                contents = contents or {}
+                aggregates[(unit_function, consumption_type, action)] = {
+                    period: _aggregate(contents.get(resolution), resolution, first, end, now)
+                    for period, (resolution, first, end) in AGGREGATE_PERIODS.items()
+                }
+    totals = {}
+    for (_, consumption_type, _), values in aggregates.items():
+        if values[SHARE_PERIOD] is not None:
+            totals[consumption_type] = totals.get(consumption_type, 0) + values[SHARE_PERIOD]
+    for (_, consumption_type, _), values in aggregates.items():
+        total = totals.get(consumption_type)
+        share = values[SHARE_PERIOD] / total * 100 if total and values[SHARE_PERIOD] is not None else None
+        values[f'share_{SHARE_PERIOD}'] = round(share, 1) if share is not None else None
+    return aggregates
+
+
+class CumulativeMeter:
+    """
+    Monotonic energy counter. The value of a two hour bucket is added once the adapter starts the next
+    bucket, so the in-progress bucket is never counted twice. The running total and the number of the last
+    added bucket are all that needs to be kept across restarts.
+    """
+
+    def __init__(self, total: float = 0.0, last_bucket: int = None):
+        self.total = total
+        self.last_bucket = last_bucket
+
+    def update(self, daily: list, now: datetime) -> bool:
+        """
+        Adds the buckets finished since the last update.
+        @param daily: daily consumption of the adapter, 24 buckets of yesterday and today
+        @param now: local time, used to find the day of the buckets
+        @return: True if the total changed
+        """
+        located = locate('D', daily, now)
+        if located is None:
+            return False
+        first_bucket, current_idx = located
+
+        current = first_bucket + current_idx
+        if self.last_bucket is None:
+            # Energy before the first update is not known, so counting starts with the current bucket
+            self.last_bucket = current - 1
+            return False
+
+        changed = False
+        for bucket in range(max(self.last_bucket + 1, first_bucket), current):
+            value = daily[bucket - first_bucket]
+            if value is not None and value > 0:
+                self.total += value
+                changed = True
+        if self.last_bucket + 1 < first_bucket:
+            _LOGGER.warning(f'{first_bucket - self.last_bucket - 1} consumption buckets are not available anymore')
+        self.last_bucket = max(self.last_bucket, current - 1)
+        return changed
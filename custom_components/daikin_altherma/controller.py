@@ -0,0 +1,117 @@
+"""Discovery of the units behind the Daikin Altherma adapter."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+
+from pyaltherma.controllers import (
+    AlthermaClimateControlController,
+    AlthermaController,
+    AlthermaUnitController,
+    AlthermaWaterTankController,
+)
+from pyaltherma.errors import AlthermaException
+from pyaltherma.profile import AlthermaUnit
+from pyaltherma.utils import query_object
+
+_LOGGER = logging.getLogger(__name__)
+
+MAX_UNITS = 10
+
+UNIT_CONTROLLERS = {
+    'function/SpaceHeating': AlthermaClimateControlController,
+    'function/DomesticHotWaterTank': AlthermaWaterTankController,
+    'function/DomesticHotWater': AlthermaWaterTankController,
+}
+
+
+class AlthermaDeviceController(AlthermaController):
+    """
+    AlthermaController which decodes the unit profiles and builds the unit controllers in the executor.
+    Only the requests to the adapter run on the event loop.
+    """
+
+    async def discover_units(self, guess_units=True):
+        loop = asyncio.get_running_loop()
+        for i in range(0, MAX_UNITS):
+            dest = f"[0]/MNAE/{i}/UnitProfile/la"
+            try:
+                resp_obj = await self._connection.request(dest)
+                resp_code = query_object(resp_obj, 'm2m:rsp/rsc')
+                if resp_code != 2000:
+                    _LOGGER.debug('No more devices found')
+                    break
+                _LOGGER.debug(f'Discovered unit {i}')
+                con = query_object(resp_obj, 'm2m:rsp/pc/m2m:cin/con')
+
+                req = await self._connection.request(f'[0]/MNAE/{i}')
+                label = query_object(req, 'm2m:rsp/pc/m2m:cnt/lbl')
+
+                profile, unit_controller = await loop.run_in_executor(
+                    None, self._create_unit_controller, i, con, label, guess_units)
+                unit_name = await unit_controller.unit_name
+                self._add_unit(i, dest, profile, label, unit_name, unit_controller)
+            except AlthermaException:
+                _LOGGER.debug('No more devices found')
+                break
+        self._select_base_unit()
+
+    async def async_load_profiles(self, profiles: list):
+        """Creates the unit controllers from stored profiles without any requests to the adapter."""
+        unit_controllers = await asyncio.get_running_loop().run_in_executor(
+            None, self._create_unit_controllers, profiles)
+        for profile, unit_controller in zip(profiles, unit_controllers):
+            self._add_unit(profile['idx'], profile['dest'], profile['profile'], profile['label'],
+                           profile['unit_name'], unit_controller)
+        self._select_base_unit()
+
+    async def refresh(self):
+        """
+        Reads the profiles of all the units again. A failure is raised, pyaltherma catches it with a class which is
+        not an exception.
+        """
+        for unit_controller in self._altherma_units.values():
+            await unit_controller.refresh_profile()
+
+    def _create_unit_controllers(self, profiles: list) -> list:
+        unit_controllers = []
+        for profile in profiles:
+            _, unit_controller = self._create_unit_controller(profile['idx'], profile['profile'], profile['label'])
+            # The name is known already, so it is not requested from the adapter
+            unit_controller._unit_name = profile['unit_name']
+            unit_controllers.append(unit_controller)
+        return unit_controllers
+
+    def _create_unit_controller(self, idx, con, label, guess_units=True):
+        profile = json.loads(con) if isinstance(con, str) else con
+        unit = AlthermaUnit(idx, profile, label)
+        controller_class = UNIT_CONTROLLERS.get(label, AlthermaUnitController) if guess_units \
+            else AlthermaUnitController
+        # The controller parses the profile when it is created
+        return profile, controller_class(unit, self._connection, label)
+
+    def _add_unit(self, idx, dest, profile, label, unit_name, unit_controller):
+        if isinstance(unit_controller, AlthermaClimateControlController):
+            _LOGGER.info(f'Discovered unit: Climate Control with id: {idx} {label}')
+            self._climate_control = unit_controller
+        elif isinstance(unit_controller, AlthermaWaterTankController):
+            _LOGGER.info(f'Discovered unit: Water Tank Controller with id: {idx} {label}')
+            self._hot_water_tank = unit_controller
+        elif label == 'function/Adapter':
+            _LOGGER.info(f'Discovered unit: function adapter: {idx} {label}')
+        else:
+            _LOGGER.warning(f'Discovered unrecognized unit with id: {idx} {label}')
+
+        self._profiles.append({
+            'idx': idx, 'dest': dest, 'profile': profile, 'label': label,
+            'unit_name': unit_name if unit_name is not None else 0
+        })
+        self._altherma_units[label] = unit_controller
+
+    def _select_base_unit(self):
+        # Likely to be general unit
+        if 'function/Adapter' in self._altherma_units:
+            self._base_unit = self._altherma_units['function/Adapter']
+        else:
+            self._base_unit = None
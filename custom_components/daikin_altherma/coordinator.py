@@ -0,0 +1,47 @@
+"""Update coordinator for the Daikin Altherma integration."""
+from __future__ import annotations
+
+from datetime import timedelta
+
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+
+class AlthermaCoordinator(DataUpdateCoordinator):
+    """
+    DataUpdateCoordinator which can be profiled by the profile service.
+    The adapter is read at most every min_interval seconds, by the schedule and by requested refreshes alike,
+    so every refresh is a real read of the adapter.
+    """
+
+    profiler = None
+
+    def __init__(self, hass, logger, *, min_interval: float, update_interval: timedelta, **kwargs):
+        super().__init__(
+            hass,
+            logger,
+            update_interval=max(update_interval, timedelta(seconds=min_interval)),
+            request_refresh_debouncer=Debouncer(hass, logger, cooldown=min_interval, immediate=True),
+            **kwargs,
+        )
+
+    def set_rate(self, update_interval: timedelta, min_interval: float):
+        """Changes the update interval and the cooldown of requested refreshes while running."""
+        self.update_interval = max(update_interval, timedelta(seconds=min_interval))
+        self._debounced_refresh.cooldown = min_interval
+        if self._unsub_refresh is not None:
+            # The next refresh is already scheduled with the old interval
+            self._schedule_refresh()
+
+    async def _async_refresh(self, *args, **kwargs) -> None:
+        profiler = self.profiler
+        if profiler is None:
+            await super()._async_refresh(*args, **kwargs)
+            return
+
+        # Listeners are notified at the end of the refresh, so state writes are profiled too
+        profiler.enable()
+        try:
+            await super()._async_refresh(*args, **kwargs)
+        finally:
+            profiler.disable(self)
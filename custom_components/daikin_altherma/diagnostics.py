@@ -0,0 +1,37 @@
+"""Diagnostics of a Daikin Altherma config entry."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, IDENTIFYING_DEVICE_INFO
+
+TO_REDACT = IDENTIFYING_DEVICE_INFO
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    api = hass.data[DOMAIN][entry.entry_id]
+    metrics = api.metrics
+    return {
+        'info': async_redact_data(api.info, TO_REDACT),
+        'options': dict(entry.options),
+        'available': api.available,
+        'stale': api.stale,
+        'profiles': api.device.profiles,
+        'status': api.status,
+        'missing_resources': api.missing_resources,
+        'unsupported_resources': api.unsupported.as_list(),
+        'timeouts': {operation_class: api.timeouts.timeout(operation_class) for operation_class in api.timeouts.as_dict()},
+        'metrics': {
+            'p95_poll_duration': metrics.p95_poll_duration,
+            'requests_per_minute': metrics.requests_per_minute,
+            'reconnects_per_hour': metrics.reconnects_per_hour,
+            'consecutive_failures': metrics.consecutive_failures,
+            'deduplicated_fetches': metrics.deduplicated_fetches,
+            'retried_resources': metrics.retried_resources,
+            'flaps': metrics.flaps,
+        },
+    }
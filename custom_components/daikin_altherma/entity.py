@@ -0,0 +1,61 @@
+"""Base entity of the Daikin Altherma integration."""
+from __future__ import annotations
+
+import time
+
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import ATTR_STALE
+
+
+class AlthermaEntity(CoordinatorEntity):
+    """Entity which reads its state from the AlthermaAPI status."""
+
+    def __init__(self, coordinator, api):
+        super().__init__(coordinator)
+        self._api = api
+
+    @property
+    def device_info(self):
+        return self._attr_device_info
+
+    @property
+    def available(self):
+        return self._api.available
+
+    @property
+    def extra_state_attributes(self):
+        attributes = self.unit_state_attributes
+        if self._api.stale:
+            # The state is restored from the last known status and it is not confirmed by the adapter yet
+            attributes = {**(attributes or {}), ATTR_STALE: True}
+        return attributes
+
+    @property
+    def unit_state_attributes(self):
+        """State attributes of the entity, apart from the common ones."""
+        return None
+
+
+class Deadband:
+    """
+    Published value of a noisy measurement. It follows the measurement only when it moves by more than the
+    deadband or when heartbeat seconds passed since the last published value. Checked on every update.
+    """
+
+    def __init__(self):
+        self.value = None
+        self._published_at = None
+
+    def update(self, value, deadband: float, heartbeat: float):
+        now = time.monotonic()
+        if (
+                value is None
+                or self.value is None
+                or abs(value - self.value) > deadband
+                or (heartbeat and now - self._published_at >= heartbeat)
+        ):
+            if value != self.value:
+                self._published_at = now
+            self.value = value
+        return self.value
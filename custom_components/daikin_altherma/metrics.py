@@ -0,0 +1,128 @@
+"""Helpers for measuring the performance of the Daikin Altherma adapter."""
+from __future__ import annotations
+
+import math
+import time
+from collections import deque
+
+
+def percentile(values, pct: float):
+    """
+    Returns the given percentile of the values using the nearest-rank method.
+    @param values: iterable of numbers
+    @param pct: percentile between 0 and 100
+    @return: percentile value or None if there are no values
+    """
+    ordered = sorted(values)
+    if len(ordered) == 0:
+        return None
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+def summarize(values) -> dict:
+    """Returns count, min, mean, max and the common percentiles of the values."""
+    values = list(values)
+    if len(values) == 0:
+        return {'count': 0}
+    return {
+        'count': len(values),
+        'min': min(values),
+        'mean': sum(values) / len(values),
+        'p50': percentile(values, 50),
+        'p90': percentile(values, 90),
+        'p95': percentile(values, 95),
+        'p99': percentile(values, 99),
+        'max': max(values),
+    }
+
+
+class AdapterMetrics:
+    """Counters describing the health of the connection to one adapter."""
+
+    POLL_HISTORY = 100
+
+    def __init__(self):
+        self._poll_durations = deque(maxlen=self.POLL_HISTORY)
+        self._requests = deque()
+        self._connects = deque()
+        self._connect_count = 0
+        self._last_success = None
+        self._command_issued = None
+        self.last_poll_duration = None
+        self.last_command_latency = None
+        self.consecutive_failures = 0
+        self.deduplicated_fetches = 0
+        self.retried_resources = 0
+        self.flaps = 0
+
+    def record_request(self):
+        self._requests.append(time.monotonic())
+        _count_since(self._requests, 60)
+
+    def record_connect(self):
+        self._connect_count += 1
+        # The very first connection is not a reconnect
+        if self._connect_count > 1:
+            self._connects.append(time.monotonic())
+            _count_since(self._connects, 3600)
+
+    def record_command(self):
+        if self._command_issued is None:
+            self._command_issued = time.monotonic()
+
+    def record_deduplicated(self):
+        """Records an update which joined a fetch in progress instead of reading the adapter again."""
+        self.deduplicated_fetches += 1
+
+    def record_retry(self):
+        """Records a resource read again because its response was incomplete."""
+        self.retried_resources += 1
+
+    def record_flap(self):
+        """Records failed updates in a row which were followed by a successful one."""
+        self.flaps += 1
+
+    def record_poll(self, started: float, success: bool):
+        """
+        Records a finished poll.
+        @param started: time.monotonic() when the poll started
+        @param success: whatever the poll returned the status
+        """
+        now = time.monotonic()
+        self.last_poll_duration = now - started
+        self._poll_durations.append(self.last_poll_duration)
+        if not success:
+            self.consecutive_failures += 1
+            return
+        self.consecutive_failures = 0
+        self._last_success = now
+        # The state written by the command is visible once a poll started after it succeeds
+        if self._command_issued is not None and self._command_issued <= started:
+            self.last_command_latency = now - self._command_issued
+            self._command_issued = None
+
+    @property
+    def p95_poll_duration(self):
+        return percentile(self._poll_durations, 95)
+
+    @property
+    def requests_per_minute(self) -> int:
+        return _count_since(self._requests, 60)
+
+    @property
+    def reconnects_per_hour(self) -> int:
+        return _count_since(self._connects, 3600)
+
+    @property
+    def last_success_age(self):
+        if self._last_success is None:
+            return None
+        return time.monotonic() - self._last_success
+
+
+def _count_since(timestamps: deque, seconds: float) -> int:
+    threshold = time.monotonic() - seconds
+    while timestamps and timestamps[0] < threshold:
+        timestamps.popleft()
+    return len(timestamps)
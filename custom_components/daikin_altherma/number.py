@@ -1,12 +1,12 @@
 import logging
 from homeassistant.components.number import NumberEntity
 from homeassistant.const import UnitOfTemperature
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
-)
 from pyaltherma.const import ClimateControlMode
 
-from . import DOMAIN, AlthermaAPI
+from .api import AlthermaAPI
+from .const import DOMAIN
+from .entity import AlthermaEntity
+from .operations import NUMBER, OperationDescription
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -15,11 +15,11 @@ async def async_setup_entry(hass, entry, async_add_entities):
     """Set up Daikin climate based on config_entry."""
     api = hass.data[DOMAIN].get(entry.entry_id)
 
-    coordinator = hass.data[DOMAIN]['coordinator']
     entities = []
     device = api.device
     climate_control = device.climate_control
     if climate_control is not None:
+        coordinator = api.channel(climate_control.unit_function)
         unit = climate_control.unit
         if unit is not None:
             operations = unit.operations
@@ -27,96 +27,53 @@ async def async_setup_entry(hass, entry, async_add_entities):
                     'LeavingWaterTemperatureOffsetCooling' in operations or \
                     'LeavingWaterTemperatureOffsetAuto' in operations:
                 entities.append(AlthermaUnitTemperatureControl(coordinator, api))
-            if 'TargetTemperatureDay' in operations:
-                profile = operations['TargetTemperatureDay']
-                if type(profile) is dict:
-                    entities.append(
-                        GenericOperationControl(
-                            coordinator, api, 'Target Temperature Day', 'TargetTemperatureDay', profile)
-                    )
-                else:
-                    _LOGGER.error(f'Profile (TargetTemperatureDay) is not dictionary!')
-
-            if 'TargetTemperatureNight' in operations:
-                profile = operations['TargetTemperatureNight']
-                if type(profile) is dict:
-                    entities.append(
-                        GenericOperationControl(
-                            coordinator, api, 'Target Temperature Night', 'TargetTemperatureNight', profile)
-                    )
-                else:
-                    _LOGGER.error(f'Profile (TargetTemperatureNight) is not dictionary!')
-
             if 'RoomTemperatureHeating' in operations or \
                     'RoomTemperatureCooling' in operations or \
                     'RoomTemperatureAuto' in operations:
                 entities.append(RoomTemperatureOperationControl(coordinator, api))
+    # Other settable operations of every unit, for example TargetTemperatureDay
+    for description in api.operation_table.get(NUMBER, []):
+        entities.append(GenericOperationControl(api.channel(description.unit_function), api, description))
     #async_add_entities([
     #    AlthermaUnitTemperatureControl(coordinator, api)
     #], update_before_add=False)
     async_add_entities(entities, update_before_add=False)
 
 
-class GenericOperationControl(NumberEntity, CoordinatorEntity):
-    def __init__(self, coordinator, api: AlthermaAPI, name: str, operation: str, profile):
-        super().__init__(coordinator)
-        self._api = api
-        self._operation = operation
-        self._profile = profile
-        self._attr_name = name
-        self._attr_device_info = api.space_heating_device_info
-        self._attr_unique_id = f"{self._api.info['serial_number']}-{operation}-SpaceHeating-control"
-        self._attr_icon = 'mdi:sun-thermometer-outline'
-        self._attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS
-
-    @property
-    def native_value(self) -> float:
-        status = self._api.space_heating_status
-        operations = status.get('operations', {})
-        return operations.get(self._operation, 0)
+class GenericOperationControl(NumberEntity, AlthermaEntity):
+    """Number of a settable operation with a range, described by the unit profile."""
 
-    @property
-    def native_min_value(self) -> float:
-        val = self._profile['minValue']
-        return val
-
-    @property
-    def native_max_value(self) -> float:
-        val = self._profile['maxValue']
-        return val
-
-    @property
-    def native_step(self) -> float:
-        val = self._profile['stepValue']
-        return val
+    def __init__(self, coordinator, api: AlthermaAPI, description: OperationDescription):
+        super().__init__(coordinator, api)
+        self._unit_function = description.unit_function
+        self._operation = description.operation
+        unit = description.unit_function.split('/')[-1]
+        self._attr_name = description.name
+        self._attr_device_info = api.unit_device_info(description.unit_function)
+        self._attr_unique_id = f"{self._api.info['serial_number']}-{description.operation}-{unit}-control"
+        self._attr_native_min_value = description.min_value
+        self._attr_native_max_value = description.max_value
+        self._attr_native_step = description.step
+        if 'Temperature' in description.operation:
+            self._attr_icon = 'mdi:sun-thermometer-outline'
+            self._attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS
 
     @property
-    def device_info(self):
-        return self._attr_device_info
+    def native_value(self) -> float:
+        return self._api.status[self._unit_function]['operations'].get(self._operation, 0)
 
     @property
     def mode(self) -> str:
         return 'box'
 
     async def async_set_native_value(self, value: float) -> None:
-        await self._api.device.climate_control.call_operation(self._operation, float(value), validate=False)
+        controller = self._api.device.altherma_units[self._unit_function]
+        await controller.call_operation(self._operation, float(value), validate=False)
         await self.coordinator.async_request_refresh()
 
-    @property
-    def device_info(self):
-        return self._attr_device_info
-
-    @property
-    def available(self):
-        return self._api.available
-
-    async def async_update(self):
-        await self._api.async_update()
-
-class RoomTemperatureOperationControl(NumberEntity, CoordinatorEntity):
+class RoomTemperatureOperationControl(NumberEntity, AlthermaEntity):
     def __init__(self, coordinator, api: AlthermaAPI):
-        super().__init__(coordinator)
-        self._api = api
+        super().__init__(coordinator, api)
         self._attr_name = 'Room Temperature'
         self._attr_device_info = api.space_heating_device_info
         self._attr_unique_id = f"{self._api.info['serial_number']}-SpaceHeating-room-temp"
@@ -163,26 +120,14 @@ class RoomTemperatureOperationControl(NumberEntity, CoordinatorEntity):
         await self._api.device.climate_control.call_operation(key, float(value))
         await self.coordinator.async_request_refresh()
 
-    @property
-    def device_info(self):
-        return self._attr_device_info
-
-    @property
-    def available(self):
-        return self._api.available
-
-    async def async_update(self):
-        await self._api.async_update()
-
     @property
     def mode(self) -> str:
         return 'box'
 
-class AlthermaUnitTemperatureControl(NumberEntity, CoordinatorEntity):
+class AlthermaUnitTemperatureControl(NumberEntity, AlthermaEntity):
 
     def __init__(self, coordinator, api: AlthermaAPI):
-        super().__init__(coordinator)
-        self._api = api
+        super().__init__(coordinator, api)
         self._attr_name = 'Temperature Control'
         self._attr_device_info = api.space_heating_device_info
         self._attr_unique_id = f"{self._api.info['serial_number']}-SpaceHeating-temp-control"
@@ -234,17 +179,6 @@ class AlthermaUnitTemperatureControl(NumberEntity, CoordinatorEntity):
         await self._api.device.climate_control.call_operation(key, float(value))
         await self.coordinator.async_request_refresh()
 
-    @property
-    def device_info(self):
-        return self._attr_device_info
-
-    @property
-    def available(self):
-        return self._api.available
-
-    async def async_update(self):
-        await self._api.async_update()
-
     @property
     def mode(self) -> str:
         return 'box'
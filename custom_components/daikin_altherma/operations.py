@@ -0,0 +1,76 @@
+"""Settable operations of the unit profiles and the generic entities which control them."""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+
+NUMBER = 'number'
+SELECT = 'select'
+SWITCH = 'switch'
+
+SWITCH_STATES = ['0', '1']
+
+# Operations with a dedicated entity: the power switch, the operation mode select, the water heater and the
+# temperature controls which follow the operation mode
+DEDICATED_OPERATIONS = {
+    'Power', 'OperationMode', 'powerful', 'TargetTemperature', 'DomesticHotWaterTemperatureHeating',
+    *(f'{prefix}{mode}' for prefix in ('LeavingWaterTemperature', 'LeavingWaterTemperatureOffset', 'RoomTemperature')
+      for mode in ('Heating', 'Cooling', 'Auto')),
+}
+
+
+@dataclass(frozen=True)
+class OperationDescription:
+    """A settable operation of a unit and the entity type which controls it."""
+
+    platform: str
+    unit_function: str
+    operation: str
+    name: str
+    min_value: float = None
+    max_value: float = None
+    step: float = None
+    options: list = None
+    # Option of a select -> value of the operation config, which can be a number
+    values: dict = None
+
+
+def _name(operation: str) -> str:
+    # TargetTemperatureDay -> Target Temperature Day
+    return re.sub(r'(?<=[a-z])(?=[A-Z])', ' ', operation)
+
+
+def describe_operation(unit_function: str, operation: str, config) -> OperationDescription | None:
+    """@return: the description of a settable operation or None if it is not settable"""
+    name = _name(operation)
+    if isinstance(config, list):
+        if sorted(str(state) for state in config) == SWITCH_STATES:
+            return OperationDescription(SWITCH, unit_function, operation, name)
+        values = {str(value): value for value in config}
+        return OperationDescription(SELECT, unit_function, operation, name, options=list(values), values=values)
+    if not isinstance(config, dict):
+        return None
+    if isinstance(config.get('heating'), dict):
+        config = config['heating']
+    if not config.get('settable', True) or 'minValue' not in config or 'maxValue' not in config:
+        return None
+    return OperationDescription(NUMBER, unit_function, operation, name, config['minValue'], config['maxValue'],
+                                config.get('stepValue', 1))
+
+
+def build_operation_table(device) -> dict:
+    """
+    One pass over the operation config of every unit.
+    @return: platform -> descriptions of the settable operations without a dedicated entity
+    """
+    table = {NUMBER: [], SELECT: [], SWITCH: []}
+    for unit_function, controller in device.altherma_units.items():
+        if controller.unit is None:
+            continue
+        for operation, config in controller.unit.operation_config.items():
+            if operation in DEDICATED_OPERATIONS:
+                continue
+            description = describe_operation(unit_function, operation, config)
+            if description is not None:
+                table[description.platform].append(description)
+    return table
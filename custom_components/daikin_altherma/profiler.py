@@ -0,0 +1,106 @@
+"""On-demand profiling of the coordinator update and the entity state writes."""
+from __future__ import annotations
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+from datetime import datetime
+
+import voluptuous as vol
+from homeassistant.core import HomeAssistant, ServiceCall
+import homeassistant.helpers.config_validation as cv
+
+from .const import DOMAIN, SERVICE_PROFILE, ATTR_CYCLES, DEFAULT_PROFILE_CYCLES, PROFILE_REPORT_LINES
+
+_LOGGER = logging.getLogger(__name__)
+
+PROFILE_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_CYCLES, default=DEFAULT_PROFILE_CYCLES): vol.All(cv.positive_int, vol.Range(min=1, max=100)),
+})
+
+
+class UpdateProfiler:
+    """
+    Profiles a number of update cycles, including the listener (state write) callbacks.
+    A cycle is finished once every update channel refreshed, so it covers all the units whatever their number.
+    """
+
+    def __init__(self, cycles: int, channels: list, on_finished):
+        self._profile = cProfile.Profile()
+        self._depth = 0
+        self._on_finished = on_finished
+        self._reported = False
+        self._channels = set(map(id, channels))
+        # Channels which refreshed in the current cycle
+        self._refreshed = set()
+        self.remaining = cycles
+        self.cycles = cycles
+
+    @property
+    def finished(self) -> bool:
+        return self.remaining <= 0
+
+    def enable(self):
+        # Refreshes of several coordinators can interleave, the profiler runs while any of them is active
+        self._depth += 1
+        if self._depth == 1:
+            self._profile.enable()
+
+    def disable(self, channel):
+        self._depth -= 1
+        if self._depth == 0:
+            self._profile.disable()
+        self._refreshed.add(id(channel))
+        if self._refreshed >= self._channels:
+            self._refreshed = set()
+            self.remaining -= 1
+        if self.finished and self._depth == 0 and not self._reported:
+            self._reported = True
+            self._on_finished(self)
+
+    def report(self) -> str:
+        stream = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=stream)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_REPORT_LINES)
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(PROFILE_REPORT_LINES)
+        return stream.getvalue()
+
+
+def _write_report(path: str, profiler: UpdateProfiler):
+    with open(path, 'w') as f:
+        f.write(profiler.report())
+
+
+def async_register_services(hass: HomeAssistant):
+    if hass.services.has_service(DOMAIN, SERVICE_PROFILE):
+        return
+
+    def _finished(profiler: UpdateProfiler):
+        for coordinator in _coordinators(hass):
+            if coordinator.profiler is profiler:
+                coordinator.profiler = None
+        filename = f"{DOMAIN}_profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+        path = os.path.join(hass.config.config_dir, filename)
+        hass.async_add_executor_job(_write_report, path, profiler)
+        _LOGGER.info(f'Profile of {profiler.cycles} update cycles written to {path}')
+
+    async def async_profile(call: ServiceCall):
+        coordinators = _coordinators(hass)
+        if any(coordinator.profiler is not None for coordinator in coordinators):
+            _LOGGER.warning('Profiling is already running.')
+            return
+        profiler = UpdateProfiler(call.data[ATTR_CYCLES], coordinators, _finished)
+        for coordinator in coordinators:
+            coordinator.profiler = profiler
+        _LOGGER.info(f'Profiling the next {profiler.cycles} update cycles.')
+
+    hass.services.async_register(DOMAIN, SERVICE_PROFILE, async_profile, schema=PROFILE_SCHEMA)
+
+
+def _coordinators(hass: HomeAssistant) -> list:
+    coordinators = []
+    for api in hass.data.get(DOMAIN, {}).values():
+        coordinators.extend(api.channels.values())
+    return coordinators
@@ -0,0 +1,77 @@
+"""Index of the resources which make up the status of a unit and validation of their responses."""
+from __future__ import annotations
+
+import json
+from typing import Callable, NamedTuple
+
+from .unsupported import is_cached
+
+# Outcome of a read
+VALID = 'valid'
+# The adapter answered with an error code, for example not found. Asking again gives the same answer.
+ABSENT = 'absent'
+# The response is incomplete or does not decode, for example a dropped part of the payload. Worth a retry.
+INVALID = 'invalid'
+# The adapter was not asked, the resource is cached as not supported. The previous value is kept.
+UNKNOWN = 'unknown'
+
+
+class UnitResource(NamedTuple):
+    """One resource of the unit status: status[section][key] is decode(content of dest)."""
+
+    section: str
+    key: str | None
+    dest: str
+    decode: Callable
+    default: object
+
+
+def _decode_state(content) -> bool:
+    return bool(content)
+
+
+def _decode_consumption(content) -> dict:
+    return json.loads(content)
+
+
+def build_resource_index(controller) -> list:
+    """Resources read by a status update of the unit, in the order pyaltherma reads them."""
+    unit = controller.unit
+    base = f'/[0]/MNAE/{unit.unit_id}'
+    resources = [
+        UnitResource('sensors', sensor, f'{base}/Sensor/{sensor}/la', lambda content: content, None)
+        for sensor in unit.sensor_list
+    ]
+    operations = list(unit.operations.keys()) if isinstance(unit.operations, dict) else unit.operations
+    for operation in operations:
+        # The profile has "powerful" while the resource is "Powerful"
+        name = 'Powerful' if operation == 'powerful' else operation
+        resources.append(UnitResource('operations', operation, f'{base}/Operation/{name}/la', lambda content: content,
+                                      None))
+    for state in unit.unit_states:
+        resources.append(UnitResource('states', state, f'{base}/UnitStatus/{state}/la', _decode_state, False))
+    if unit.consumptions_available:
+        resources.append(UnitResource('consumption', None, f'{base}/Consumption/la', _decode_consumption, {}))
+    return resources
+
+
+def decode_response(resource: UnitResource, response) -> tuple:
+    """@return: outcome (VALID, ABSENT, INVALID or UNKNOWN) and the decoded value, None unless it is valid"""
+    if is_cached(response):
+        return UNKNOWN, None
+    if not isinstance(response, dict) or not isinstance(response.get('m2m:rsp'), dict):
+        return INVALID, None
+    rsp = response['m2m:rsp']
+    rsc = rsp.get('rsc')
+    if isinstance(rsc, int) and rsc >= 4000:
+        return ABSENT, None
+    cin = rsp.get('pc', {}).get('m2m:cin') if isinstance(rsp.get('pc'), dict) else None
+    if not isinstance(cin, dict) or 'con' not in cin:
+        return INVALID, None
+    content = cin['con']
+    if content in (None, ''):
+        return INVALID, None
+    try:
+        return VALID, resource.decode(content)
+    except (TypeError, ValueError):
+        return INVALID, None
@@ -0,0 +1,110 @@
+"""Probe and scan for Daikin Altherma adapters on networks without mDNS."""
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import logging
+import time
+
+import async_timeout
+from aiohttp import ClientError
+from pyaltherma.controllers import AlthermaController
+from pyaltherma.errors import AlthermaException
+
+from .connection import AlthermaConnection
+from .const import DOMAIN, SCAN_CONCURRENCY, SCAN_CONNECT_TIMEOUT_SECONDS, SCAN_RESPONSE_TIMEOUT_SECONDS, SCAN_MAX_HOSTS, \
+    PROBE_CACHE_TTL_SECONDS
+
+DATA_PROBE_CACHE = f"{DOMAIN}_probe_cache"
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_probe(session, host: str, connect_timeout: float = SCAN_CONNECT_TIMEOUT_SECONDS,
+                      response_timeout: float = SCAN_RESPONSE_TIMEOUT_SECONDS) -> dict | None:
+    """
+    Reads the adapter info of host with a single request.
+    Hosts which do not accept the websocket of the adapter are rejected before anything is sent.
+    @return: adapter info with the host or None if host is not an adapter
+    """
+    conn = AlthermaConnection(session, host, timeout=response_timeout)
+    try:
+        async with async_timeout.timeout(connect_timeout):
+            await conn.connect()
+        info = await AlthermaController(conn).device_info()
+    except (ClientError, OSError, asyncio.TimeoutError, AlthermaException, ValueError):
+        _LOGGER.debug(f'{host} is not a Daikin Altherma adapter', exc_info=True)
+        return None
+    finally:
+        try:
+            await conn.close()
+        except (ClientError, OSError):
+            pass
+    if info.get('serial_number') is None:
+        return None
+    return {**info, 'host': host}
+
+
+async def async_scan(session, network: str, port: int = 80, concurrency: int = SCAN_CONCURRENCY) -> list:
+    """
+    Probes every address of the network, for example 192.168.1.0/24, with at most concurrency probes at once.
+    @return: adapter info with the host of every adapter found, once per serial number
+    """
+    ip_network = ipaddress.ip_network(network, strict=False)
+    # Checked before the addresses are listed, a /8 or an IPv6 network would not fit in memory
+    if ip_network.num_addresses > SCAN_MAX_HOSTS:
+        raise ValueError(f'{network} has {ip_network.num_addresses} addresses, at most {SCAN_MAX_HOSTS} can be scanned')
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _probe(address):
+        host = f'[{address}]' if address.version == 6 else str(address)
+        if port != 80:
+            host = f'{host}:{port}'
+        async with semaphore:
+            return await async_probe(session, host)
+
+    found = {}
+    for info in await asyncio.gather(*(_probe(address) for address in ip_network.hosts())):
+        # An adapter with several addresses in the network is reported once
+        if info is not None and info['serial_number'] not in found:
+            found[info['serial_number']] = info
+    return list(found.values())
+
+
+class ProbeCache:
+    """
+    Successful results of async_probe by host, kept for ttl seconds. A failed probe is not kept, an adapter which
+    announces itself before its websocket accepts connections is probed again on its next announcement.
+    """
+
+    def __init__(self, ttl: float = PROBE_CACHE_TTL_SECONDS):
+        self._ttl = ttl
+        self._entries = {}
+        # Probe in progress per host, concurrent announcements of a host join it
+        self._in_flight = {}
+
+    async def async_probe(self, session, host: str) -> dict | None:
+        now = time.monotonic()
+        entry = self._entries.get(host)
+        if entry is not None and now - entry[0] < self._ttl:
+            return entry[1]
+        task = self._in_flight.get(host)
+        if task is None:
+            task = self._in_flight[host] = asyncio.get_running_loop().create_task(self._async_probe(session, host))
+            task.add_done_callback(lambda _: self._in_flight.pop(host, None))
+        # A cancelled caller must not cancel the probe the other callers wait for
+        return await asyncio.shield(task)
+
+    async def _async_probe(self, session, host: str) -> dict | None:
+        info = await async_probe(session, host)
+        now = time.monotonic()
+        self._entries = {key: value for key, value in self._entries.items() if now - value[0] < self._ttl}
+        if info is not None:
+            self._entries[host] = (now, info)
+        return info
+
+
+def async_get_probe_cache(hass) -> ProbeCache:
+    if DATA_PROBE_CACHE not in hass.data:
+        hass.data[DATA_PROBE_CACHE] = ProbeCache()
+    return hass.data[DATA_PROBE_CACHE]
@@ -1,11 +1,11 @@
 import logging
 from homeassistant.components.select import SelectEntity
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
-)
 from pyaltherma.const import ClimateControlMode
 
-from . import DOMAIN, AlthermaAPI
+from .api import AlthermaAPI
+from .const import DOMAIN
+from .entity import AlthermaEntity
+from .operations import SELECT, OperationDescription
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -14,17 +14,19 @@ async def async_setup_entry(hass, entry, async_add_entities):
     """Set up Daikin climate based on config_entry."""
     api = hass.data[DOMAIN].get(entry.entry_id)
 
-    coordinator = hass.data[DOMAIN]['coordinator']
-    async_add_entities([
-        AlthermaUnitOperationMode(coordinator, api)
-    ], update_before_add=False)
+    entities = []
+    if api.device.climate_control is not None:
+        entities.append(AlthermaUnitOperationMode(api.channel(api.device.climate_control.unit_function), api))
+    # Operations of every unit with a list of values
+    for description in api.operation_table.get(SELECT, []):
+        entities.append(AlthermaOperationSelect(api.channel(description.unit_function), api, description))
+    async_add_entities(entities, update_before_add=False)
 
 
-class AlthermaUnitOperationMode(SelectEntity, CoordinatorEntity):
+class AlthermaUnitOperationMode(SelectEntity, AlthermaEntity):
 
     def __init__(self, coordinator, api: AlthermaAPI):
-        super().__init__(coordinator)
-        self._api = api
+        super().__init__(coordinator, api)
         device = api.device
         self._attr_name = 'Operation Mode'
         self._attr_device_info = api.space_heating_device_info
@@ -50,13 +52,27 @@ class AlthermaUnitOperationMode(SelectEntity, CoordinatorEntity):
         await self._api.device.climate_control.set_operation_mode(new_op)
         await self.coordinator.async_request_refresh()
 
-    @property
-    def device_info(self):
-        return self._attr_device_info
+
+class AlthermaOperationSelect(SelectEntity, AlthermaEntity):
+    """Select of a settable operation with a list of values, described by the unit profile."""
+
+    def __init__(self, coordinator, api: AlthermaAPI, description: OperationDescription):
+        super().__init__(coordinator, api)
+        self._unit_function = description.unit_function
+        self._operation = description.operation
+        unit = description.unit_function.split('/')[-1]
+        self._attr_name = description.name
+        self._attr_device_info = api.unit_device_info(description.unit_function)
+        self._attr_unique_id = f"{self._api.info['serial_number']}-{unit}-{description.operation}-select"
+        self._attr_options = description.options
+        self._values = description.values
 
     @property
-    def available(self):
-        return self._api.available
+    def current_option(self) -> str:
+        value = self._api.status[self._unit_function]['operations'].get(self._operation)
+        return str(value) if value is not None else None
 
-    async def async_update(self):
-        await self._api.async_update()
+    async def async_select_option(self, option: str) -> None:
+        controller = self._api.device.altherma_units[self._unit_function]
+        await controller.call_operation(self._operation, self._values.get(option, option))
+        await self.coordinator.async_request_refresh()
@@ -1,20 +1,42 @@
 import logging
-from homeassistant.components.sensor import SensorEntity, SensorDeviceClass, SensorStateClass
-from homeassistant.const import UnitOfEnergy, UnitOfTemperature
+from dataclasses import dataclass
+from typing import Any
+
+from homeassistant.components.sensor import SensorEntity, SensorDeviceClass, SensorStateClass, RestoreSensor, \
+    SensorExtraStoredData
+from homeassistant.const import PERCENTAGE, EntityCategory, UnitOfEnergy, UnitOfTemperature, UnitOfTime
+from homeassistant.core import callback
 from homeassistant.helpers.typing import StateType
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
-)
+from homeassistant.util import dt as dt_util
 
-from . import DOMAIN, AlthermaAPI
+from .api import AlthermaAPI
+from .const import DOMAIN
+from .consumption import CumulativeMeter
+from .entity import AlthermaEntity, Deadband
 
 _LOGGER = logging.getLogger(__name__)
 
+MEASUREMENT = SensorStateClass.MEASUREMENT
+# Counters which only grow until a restart
+COUNTER = SensorStateClass.TOTAL_INCREASING
+# Metric -> (name, unit, device class, scale, state class)
+DIAGNOSTIC_SENSORS = {
+    'last_poll_duration': ('Last Poll Duration', UnitOfTime.MILLISECONDS, SensorDeviceClass.DURATION, 1000, MEASUREMENT),
+    'p95_poll_duration': ('P95 Poll Duration', UnitOfTime.MILLISECONDS, SensorDeviceClass.DURATION, 1000, MEASUREMENT),
+    'requests_per_minute': ('Requests Per Minute', 'requests/min', None, 1, MEASUREMENT),
+    'reconnects_per_hour': ('Reconnects Per Hour', 'reconnects/h', None, 1, MEASUREMENT),
+    'consecutive_failures': ('Consecutive Failures', None, None, 1, MEASUREMENT),
+    'last_success_age': ('Last Successful Update Age', UnitOfTime.SECONDS, SensorDeviceClass.DURATION, 1, MEASUREMENT),
+    'last_command_latency': ('Command Latency', UnitOfTime.MILLISECONDS, SensorDeviceClass.DURATION, 1000, MEASUREMENT),
+    'deduplicated_fetches': ('Deduplicated Fetches', None, None, 1, COUNTER),
+    'retried_resources': ('Retried Resources', None, None, 1, COUNTER),
+    'flaps': ('Flaps', None, None, 1, COUNTER),
+}
+
 
 async def async_setup_entry(hass, entry, async_add_entities):
     """Set up Daikin climate based on config_entry."""
     api = hass.data[DOMAIN].get(entry.entry_id)
-    coordinator = hass.data[DOMAIN]['coordinator']
     translation = {
         'LeavingWaterTemperatureCurrent': 'Leaving Water Temperature',
         'IndoorTemperature': 'Indoor Temperature',
@@ -23,6 +45,7 @@ async def async_setup_entry(hass, entry, async_add_entities):
     device = api.device
     entities = []
     if device is not None and device.climate_control is not None:
+        coordinator = api.channel(device.climate_control.unit_function)
         sensors = device.climate_control.sensors
         for sensor in sensors:
             if sensor in translation:
@@ -63,6 +86,7 @@ async def async_setup_entry(hass, entry, async_add_entities):
                     device_info = api.HWT_device_info
 
                 unit_name = await controller.unit_name
+                coordinator = api.channel(unit_function)
                 actions = controller.unit.consumptions[consumption_type].actions
                 for action, details in actions.items():
                     contents = details.consumption_contents
@@ -71,54 +95,73 @@ async def async_setup_entry(hass, entry, async_add_entities):
                             ConsumptionSensor(coordinator, api, device_info, unit_function, unit_name, action, 'D',
                                               '2 Hours', consumption_type=consumption_type, consumption_type_name=ct_name)
                         )
+                        entities.append(
+                            CumulativeConsumptionSensor(coordinator, api, device_info, unit_function, unit_name,
+                                                        action, consumption_type, ct_name)
+                        )
+                        for period in ('today', 'yesterday', 'share_today'):
+                            entities.append(
+                                ConsumptionAggregateSensor(coordinator, api, device_info, unit_function, unit_name,
+                                                           action, period, consumption_type, ct_name)
+                            )
                     if 'Weekly' in contents:
                         entities.append(
                             ConsumptionSensor(coordinator, api, device_info, unit_function, unit_name, action, 'W', 'Day',
                                               consumption_type=consumption_type, consumption_type_name=ct_name)
                         )
+                        entities.append(
+                            ConsumptionAggregateSensor(coordinator, api, device_info, unit_function, unit_name,
+                                                       action, 'this_week', consumption_type, ct_name)
+                        )
                     if 'Monthly' in contents:
                         entities.append(
                             ConsumptionSensor(coordinator, api, device_info, unit_function, unit_name, action, 'M', 'Month',
                                               consumption_type=consumption_type, consumption_type_name=ct_name)
                         )
+                        entities.append(
+                            ConsumptionAggregateSensor(coordinator, api, device_info, unit_function, unit_name,
+                                                       action, 'this_month', consumption_type, ct_name)
+                        )
 
     except:
         _LOGGER.warning('consumption information could not be added', exc_info=True)
+
+    for metric, (name, unit, device_class, scale, state_class) in DIAGNOSTIC_SENSORS.items():
+        entities.append(
+            AlthermaDiagnosticSensor(api, metric, name, unit, device_class, scale, state_class)
+        )
     async_add_entities(entities, update_before_add=False)
 
 
-class AlthermaUnitSensor(SensorEntity, CoordinatorEntity):
+class AlthermaUnitSensor(SensorEntity, AlthermaEntity):
     _attr_device_class = SensorDeviceClass.TEMPERATURE
     _attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS
 
     def __init__(self, coordinator, api: AlthermaAPI, sensor: str, name: str = None):
-        super().__init__(coordinator)
-        self._api = api
+        super().__init__(coordinator, api)
         self._attr_name = name if name is not None else sensor
         self._attr_device_info = api.space_heating_device_info
         self._attr_unique_id = f"{self._api.info['serial_number']}-SpaceHeating-{sensor}"
         self._sensor = sensor
+        self._deadband = Deadband()
+        self._update_deadband()
 
-    @property
-    def native_value(self) -> StateType:
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        self._update_deadband()
+        super()._handle_coordinator_update()
+
+    def _update_deadband(self):
         unit_status = self._api.status['function/SpaceHeating']
         sensors = unit_status['sensors']
         status = sensors[self._sensor]
         if status is not None:
-            return round(status, 2)
-        else:
-            return None
+            status = round(status, 2)
+        self._deadband.update(status, *self._api.deadband)
 
     @property
-    def device_info(self):
-        return self._attr_device_info
-
-    async def async_update(self):
-        await self._api.async_update()
-
-    @property
-    def available(self):
-        return self._api.available
+    def native_value(self) -> StateType:
+        return self._deadband.value
 
 
 def _find_last_value(a):
@@ -132,7 +175,7 @@ def _find_last_value(a):
     return last_value
 
 
-class ConsumptionSensor(SensorEntity, CoordinatorEntity):
+class ConsumptionSensor(SensorEntity, AlthermaEntity):
     _attr_device_class = SensorDeviceClass.ENERGY
     _attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
 
@@ -150,8 +193,7 @@ class ConsumptionSensor(SensorEntity, CoordinatorEntity):
             consumption_type: str = 'Electrical',
             consumption_type_name: str = 'Energy'):
 
-        super().__init__(coordinator)
-        self._api = api
+        super().__init__(coordinator, api)
         self.unit_function = unit_function
         self.unit_name = unit_name
         self.action = action
@@ -164,7 +206,7 @@ class ConsumptionSensor(SensorEntity, CoordinatorEntity):
         self._attr_unique_id = f"{self._api.info['serial_number']}/{unit_function}/{consumption_type}/{action}/{content_id}"
 
     @property
-    def extra_state_attributes(self):
+    def unit_state_attributes(self):
         unit_status = self._api.status[self.unit_function]
         consumption = unit_status['consumption'][self.consumption_type]
         consumption_action = consumption[self.action]
@@ -212,13 +254,144 @@ class ConsumptionSensor(SensorEntity, CoordinatorEntity):
 
         return last_value
 
+
+AGGREGATE_NAMES = {
+    'today': 'Today',
+    'yesterday': 'Yesterday',
+    'this_week': 'This Week',
+    'this_month': 'This Month',
+    'share_today': 'Share Today',
+}
+
+
+class ConsumptionAggregateSensor(SensorEntity, AlthermaEntity):
+    """
+    Consumption of a unit function, action and consumption type in a period, or its share of the consumption
+    of all units today. The aggregates are calculated by the API once per change of the consumption.
+    """
+    _attr_device_class = SensorDeviceClass.ENERGY
+    _attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
+    # Today, this week and this month restart from zero, which total increasing treats as a new cycle
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    def __init__(self, coordinator, api: AlthermaAPI, device_info, unit_function: str, unit_name: str, action: str,
+                 period: str, consumption_type: str = 'Electrical', consumption_type_name: str = 'Energy'):
+        super().__init__(coordinator, api)
+        self._key = (unit_function, consumption_type, action)
+        self._period = period
+        self._attr_name = f'{unit_name} {action} {consumption_type_name} {AGGREGATE_NAMES[period]}'
+        self._attr_device_info = device_info
+        self._attr_unique_id = \
+            f"{self._api.info['serial_number']}/{unit_function}/{consumption_type}/{action}/{period}"
+        if period == 'yesterday':
+            self._attr_state_class = None
+        elif period.startswith('share_'):
+            self._attr_device_class = None
+            self._attr_native_unit_of_measurement = PERCENTAGE
+            self._attr_state_class = SensorStateClass.MEASUREMENT
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        if self._period.startswith('share_'):
+            # The share depends on the consumption of the other units too
+            for unit_function, channel in self._api.channels.items():
+                if unit_function != self._key[0]:
+                    self.async_on_remove(channel.async_add_listener(self._handle_coordinator_update))
+
+    @property
+    def native_value(self) -> StateType:
+        return self._api.consumption_aggregates.get(self._key, {}).get(self._period)
+
+
+@dataclass
+class CumulativeMeterExtraData(SensorExtraStoredData):
+    """Total of the meter together with the last added bucket, so a restart does not count a bucket twice."""
+
+    last_bucket: int | None
+
+    def as_dict(self) -> dict[str, Any]:
+        data = super().as_dict()
+        data['last_bucket'] = self.last_bucket
+        return data
+
+
+class CumulativeConsumptionSensor(RestoreSensor, AlthermaEntity):
+    """
+    Monotonic energy counter of a unit function, action and consumption type for the Energy dashboard.
+    It adds the two hour buckets of the daily consumption as they are finished.
+    """
+    _attr_device_class = SensorDeviceClass.ENERGY
+    _attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    def __init__(self, coordinator, api: AlthermaAPI, device_info, unit_function: str, unit_name: str, action: str,
+                 consumption_type: str = 'Electrical', consumption_type_name: str = 'Energy'):
+        super().__init__(coordinator, api)
+        self.unit_function = unit_function
+        self.action = action
+        self.consumption_type = consumption_type
+        self._meter = CumulativeMeter()
+        self._attr_name = f'{unit_name} Total {action} {consumption_type_name}'
+        self._attr_device_info = device_info
+        self._attr_unique_id = f"{self._api.info['serial_number']}/{unit_function}/{consumption_type}/{action}/total"
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        last_data = await self.async_get_last_extra_data()
+        if last_data is not None:
+            data = last_data.as_dict()
+            if data.get('native_value') is not None:
+                self._meter = CumulativeMeter(float(data['native_value']), data.get('last_bucket'))
+        self._update_meter()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        self._update_meter()
+        super()._handle_coordinator_update()
+
+    def _update_meter(self):
+        # The restored status can be from another day, only the status read from the adapter is counted
+        if self._api.stale or self._api.status is None:
+            return
+        unit_status = self._api.status.get(self.unit_function)
+        if unit_status is None:
+            return
+        consumption = unit_status['consumption'].get(self.consumption_type, {})
+        self._meter.update(consumption.get(self.action, {}).get('D'), dt_util.now())
+
     @property
-    def available(self):
-        return self._api.available
+    def native_value(self) -> StateType:
+        return round(self._meter.total, 3)
 
     @property
-    def device_info(self):
-        return self._attr_device_info
+    def extra_restore_state_data(self) -> CumulativeMeterExtraData:
+        return CumulativeMeterExtraData(self._meter.total, self.native_unit_of_measurement, self._meter.last_bucket)
+
 
-    async def async_update(self):
-        await self._api.async_update()
+class AlthermaDiagnosticSensor(SensorEntity):
+    """
+    Performance counter of the adapter connection.
+    It is polled, because the update channels notify their listeners only when the unit status changes.
+    """
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_should_poll = True
+
+    def __init__(self, api: AlthermaAPI, metric: str, name: str, unit, device_class, scale=1,
+                 state_class=SensorStateClass.MEASUREMENT):
+        self._api = api
+        self._attr_state_class = state_class
+        self._metric = metric
+        self._scale = scale
+        self._attr_name = name
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_class = device_class
+        self._attr_device_info = api.device_info
+        self._attr_unique_id = f"{self._api.info['serial_number']}-diagnostic-{metric}"
+
+    @property
+    def native_value(self) -> StateType:
+        value = getattr(self._api.metrics, self._metric)
+        if value is None:
+            return None
+        return round(value * self._scale, 1)
@@ -0,0 +1,79 @@
+"""Persistent data of the Daikin Altherma integration."""
+from __future__ import annotations
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, STATUS_SAVE_INTERVAL_SECONDS
+
+STORAGE_VERSION = 1
+
+
+class AlthermaStore:
+    """
+    Stores the adapter info, the unit profiles, the last known status, the learned timeouts and the resources
+    which the adapter does not support of a config entry in .storage/daikin_altherma.<entry_id>.
+    The store serializes and writes the data in the executor.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str):
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+        self._data = None
+        self._status_save_pending = False
+
+    async def async_load(self) -> dict:
+        if self._data is None:
+            self._data = await self._store.async_load() or {}
+        return self._data
+
+    async def async_save_profiles(self, api):
+        data = await self.async_load()
+        data['info'] = api.info
+        data['profiles'] = api.device.profiles
+        data['device_info'] = {
+            'hot_water_tank': _device_info_data(api.HWT_device_info),
+            'space_heating': _device_info_data(api.space_heating_device_info),
+        }
+        data['status'] = api.status
+        data['timeouts'] = api.timeouts.as_dict()
+        data['unsupported'] = _unsupported_data(api)
+        await self._store.async_save(data)
+
+    async def async_clear_profiles(self):
+        """Forgets the profiles, so the units are discovered again on the next setup."""
+        data = await self.async_load()
+        data.pop('profiles', None)
+        data.pop('unsupported', None)
+        await self._store.async_save(data)
+
+    @callback
+    def async_schedule_save_status(self, api):
+        """
+        Saves the last status, the learned timeouts and the unsupported resources at most every STATUS_SAVE_INTERVAL_SECONDS
+        and when Home Assistant stops.
+        """
+        if self._status_save_pending or self._data is None:
+            return
+        self._status_save_pending = True
+
+        def _data_to_save():
+            self._status_save_pending = False
+            self._data['status'] = api.status
+            self._data['timeouts'] = api.timeouts.as_dict()
+            self._data['unsupported'] = _unsupported_data(api)
+            return self._data
+
+        self._store.async_delay_save(_data_to_save, STATUS_SAVE_INTERVAL_SECONDS)
+
+    async def async_remove(self):
+        await self._store.async_remove()
+
+
+def _unsupported_data(api) -> dict:
+    return {'firmware': api.info['firmware'], 'resources': api.unsupported.as_list()}
+
+
+def _device_info_data(device_info) -> dict | None:
+    if device_info is None:
+        return None
+    return {'model': device_info['model'], 'sw_version': device_info['sw_version']}
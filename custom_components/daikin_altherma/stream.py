@@ -0,0 +1,140 @@
+"""Delivery of the status snapshots of the adapter to any number of consumers."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Callable
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def changed_paths(previous: dict | None, current: dict, prefix: str = '') -> dict:
+    """
+    @return: key path (unit/section/key/...) -> current value of every value which differs from previous, and None
+    for every value of previous which was removed
+    """
+    changes = {}
+    previous = previous if isinstance(previous, dict) else {}
+    for key, value in current.items():
+        path = f'{prefix}{key}'
+        old = previous.get(key)
+        if isinstance(value, dict):
+            if key in previous and not isinstance(old, dict):
+                changes[path] = None
+            changes.update(changed_paths(old, value, f'{path}/'))
+            continue
+        if isinstance(old, dict):
+            changes.update(changed_paths(old, {}, f'{path}/'))
+        if value != old or key not in previous:
+            changes[path] = value
+    for key, old in previous.items():
+        if key in current:
+            continue
+        path = f'{prefix}{key}'
+        if isinstance(old, dict):
+            changes.update(changed_paths(old, {}, f'{path}/'))
+        else:
+            changes[path] = None
+    return changes
+
+
+class Subscription:
+    """
+    Latest undelivered status of one consumer. A slow consumer gets the latest status instead of a queue of
+    them, with changes_only the changes which it has not seen yet are merged.
+    """
+
+    def __init__(self, changes_only: bool):
+        self.changes_only = changes_only
+        self._pending = None
+        self._event = asyncio.Event()
+
+    def push(self, status: dict, changes: dict):
+        if self.changes_only:
+            self._pending = {**self._pending, **changes} if self._pending is not None else changes
+        else:
+            self._pending = status
+        self._event.set()
+
+    async def get(self) -> dict:
+        await self._event.wait()
+        self._event.clear()
+        value, self._pending = self._pending, None
+        return value
+
+
+class StatusIterator:
+    """
+    Async iterator over the status of a stream. It is registered when it is created, so no update is missed before
+    the first iteration, and removed by aclose.
+    """
+
+    def __init__(self, subscriptions: set, changes_only: bool):
+        self._subscriptions = subscriptions
+        self._subscription = Subscription(changes_only)
+        self._subscriptions.add(self._subscription)
+        self._closed = False
+
+    def __aiter__(self) -> StatusIterator:
+        return self
+
+    async def __anext__(self) -> dict:
+        if self._closed:
+            raise StopAsyncIteration
+        try:
+            return await self._subscription.get()
+        except asyncio.CancelledError:
+            await self.aclose()
+            raise
+
+    async def aclose(self):
+        self._closed = True
+        self._subscriptions.discard(self._subscription)
+
+
+class StatusStream:
+    """
+    Publishes every status which changed to the callbacks and the iterators of the consumers.
+    The status dicts are not copied, consumers must not change them.
+    """
+
+    def __init__(self):
+        self._callbacks = []
+        self._subscriptions = set()
+
+    @property
+    def has_consumers(self) -> bool:
+        return bool(self._callbacks or self._subscriptions)
+
+    def subscribe(self, callback: Callable[[dict], None], changes_only: bool = False) -> Callable[[], None]:
+        """
+        Calls callback with the status, or with the changed key paths, after every update which changed it.
+        @return: function which removes the callback
+        """
+        entry = (callback, changes_only)
+        self._callbacks.append(entry)
+
+        def _unsubscribe():
+            if entry in self._callbacks:
+                self._callbacks.remove(entry)
+
+        return _unsubscribe
+
+    def iterate(self, changes_only: bool = False) -> StatusIterator:
+        return StatusIterator(self._subscriptions, changes_only)
+
+    def publish(self, previous: dict | None, status: dict, unit_functions: list):
+        """Publishes the status after an update of the unit functions, unless none of their values changed."""
+        changes = {}
+        for unit_function in unit_functions:
+            changes.update(changed_paths(
+                (previous or {}).get(unit_function), status.get(unit_function) or {}, f'{unit_function}/'))
+        if not changes:
+            return
+        for subscription in self._subscriptions:
+            subscription.push(status, changes)
+        for callback, changes_only in list(self._callbacks):
+            try:
+                callback(changes if changes_only else status)
+            except Exception:
+                _LOGGER.exception(f'Status consumer {callback} failed')
@@ -1,10 +1,10 @@
 import logging
 from homeassistant.components.switch import SwitchEntity, SwitchDeviceClass
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
-)
 
-from . import DOMAIN, AlthermaAPI
+from .api import AlthermaAPI
+from .const import DOMAIN
+from .entity import AlthermaEntity
+from .operations import SWITCH
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -12,24 +12,25 @@ _LOGGER = logging.getLogger(__name__)
 async def async_setup_entry(hass, entry, async_add_entities):
     """Set up Daikin climate based on config_entry."""
     api = hass.data[DOMAIN].get(entry.entry_id)
-    coordinator = hass.data[DOMAIN]['coordinator']
-    entities = [AlthermaUnitPowerSwitch(coordinator, api)]
-
     climate_control = api.device.climate_control
-    operations = climate_control.unit.operations
-    if 'EcoMode' in operations:
-        eco_switch = AlthermaOperationSwitch(
-            coordinator, api,
-            operation='EcoMode',
-            unit_function=climate_control.unit_function,
-            states=['0', '1'],
-            attr_name="EcoMode"
+    entities = []
+    if climate_control is not None:
+        entities.append(AlthermaUnitPowerSwitch(api.channel(climate_control.unit_function), api))
+
+    # On/off operations of every unit, for example EcoMode
+    for description in api.operation_table.get(SWITCH, []):
+        entities.append(
+            AlthermaOperationSwitch(
+                api.channel(description.unit_function), api,
+                operation=description.operation,
+                unit_function=description.unit_function,
+                attr_name=description.name
+            )
         )
-        entities.append(eco_switch)
     async_add_entities(entities, update_before_add=False)
 
 
-class AlthermaOperationSwitch(SwitchEntity, CoordinatorEntity):
+class AlthermaOperationSwitch(SwitchEntity, AlthermaEntity):
     _attr_device_class = SwitchDeviceClass.SWITCH
 
     def __init__(self, coordinator, api: AlthermaAPI,
@@ -38,11 +39,11 @@ class AlthermaOperationSwitch(SwitchEntity, CoordinatorEntity):
                  attr_name='undefined',
                  icon="mdi:toggle-switch"):
 
-        super().__init__(coordinator)
-        self._api = api
+        super().__init__(coordinator, api)
         self._attr_name = attr_name
-        self._attr_device_info = api.space_heating_device_info
-        self._attr_unique_id = f"{self._api.info['serial_number']}-SpaceHeating-{attr_name}"
+        self._attr_device_info = api.unit_device_info(unit_function)
+        unit = unit_function.split('/')[-1]
+        self._attr_unique_id = f"{self._api.info['serial_number']}-{unit}-{operation}"
         self._state = None
         self._attr_icon = icon
         self._unit_function = unit_function
@@ -59,7 +60,7 @@ class AlthermaOperationSwitch(SwitchEntity, CoordinatorEntity):
         await controller.call_operation(self._operation, state, validate=False)
         self._state = state
         await self.coordinator.async_request_refresh()
-        await self._api.device.ws_connection.close()
+        await self._api.async_release_connection()
 
     async def async_turn_off(self, **kwargs) -> None:
         await self._set_state(0)
@@ -75,17 +76,6 @@ class AlthermaOperationSwitch(SwitchEntity, CoordinatorEntity):
             _LOGGER.error(f'Op {self._operation} is not in the op state {_op_state}')
             return None
 
-    @property
-    def available(self):
-        return self._api.available
-
-    @property
-    def device_info(self):
-        return self._attr_device_info
-
-    async def async_update(self):
-        await self._api.async_update()
-
     async def async_toggle(self, **kwargs) -> None:
         state = self.is_on
         if state is not None:
@@ -97,12 +87,11 @@ class AlthermaOperationSwitch(SwitchEntity, CoordinatorEntity):
             _LOGGER.warning(f'{self._unit_function}[{self._operation}] unable to determine current state.')
 
 
-class AlthermaUnitPowerSwitch(SwitchEntity, CoordinatorEntity):
+class AlthermaUnitPowerSwitch(SwitchEntity, AlthermaEntity):
     _attr_device_class = SwitchDeviceClass.SWITCH
 
     def __init__(self, coordinator, api: AlthermaAPI):
-        super().__init__(coordinator)
-        self._api = api
+        super().__init__(coordinator, api)
         self._attr_name = 'Climate Control'
         self._attr_device_info = api.space_heating_device_info
         self._attr_unique_id = f"{self._api.info['serial_number']}-SpaceHeating-power-switch"
@@ -114,14 +103,14 @@ class AlthermaUnitPowerSwitch(SwitchEntity, CoordinatorEntity):
 
         self._state = True
         await self.coordinator.async_request_refresh()
-        await self._api.device.ws_connection.close()
+        await self._api.async_release_connection()
 
     async def async_turn_off(self, **kwargs) -> None:
         await self._api.turn_off_climate_control()
 
         self._state = False
         await self.coordinator.async_request_refresh()
-        await self._api.device.ws_connection.close()
+        await self._api.async_release_connection()
 
     async def async_toggle(self, **kwargs) -> None:
         is_on = await self._api.async_is_climate_control_on()
@@ -137,16 +126,5 @@ class AlthermaUnitPowerSwitch(SwitchEntity, CoordinatorEntity):
         return state
 
     @property
-    def device_info(self):
-        return self._attr_device_info
-
-    async def async_update(self):
-        await self._api.async_update()
-
-    @property
-    def available(self):
-        return self._api.available
-
-    @property
-    def extra_state_attributes(self):
+    def unit_state_attributes(self):
         return self._api.status["function/SpaceHeating"]['states']
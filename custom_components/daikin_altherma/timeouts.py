@@ -0,0 +1,54 @@
+"""Request timeouts learned from the observed latency of the Daikin Altherma adapter."""
+from __future__ import annotations
+
+from collections import deque
+
+from .const import TIMEOUT_LIMITS_SECONDS, TIMEOUT_PERCENTILE, TIMEOUT_MULTIPLIER, TIMEOUT_MIN_SAMPLES, \
+    TIMEOUT_SAMPLES
+from .metrics import percentile
+
+CONNECT = 'connect'
+READ = 'read'
+COMMAND = 'command'
+DISCOVERY = 'discovery'
+POLL = 'poll'
+
+
+class AdaptiveTimeouts:
+    """
+    Timeout per operation class (connect, read, command, discovery, poll) of one adapter.
+    The timeout is a multiple of a high percentile of the recent latencies, limited by a floor and a ceiling.
+    Until there are enough samples the default timeout is used.
+    """
+
+    def __init__(self, data: dict = None):
+        self._latencies = {
+            operation_class: deque(maxlen=TIMEOUT_SAMPLES) for operation_class in TIMEOUT_LIMITS_SECONDS
+        }
+        if data:
+            self.load(data)
+
+    def record(self, operation_class: str, latency: float):
+        """Records the latency of a successful operation in seconds."""
+        self._latencies[operation_class].append(latency)
+
+    def timeout(self, operation_class: str) -> float:
+        default, floor, ceiling = TIMEOUT_LIMITS_SECONDS[operation_class]
+        latencies = self._latencies[operation_class]
+        if len(latencies) < TIMEOUT_MIN_SAMPLES:
+            return default
+        learned = percentile(latencies, TIMEOUT_PERCENTILE) * TIMEOUT_MULTIPLIER
+        return min(max(learned, floor), ceiling)
+
+    def load(self, data: dict):
+        """Loads the latencies saved by as_dict, unknown operation classes are ignored."""
+        for operation_class, latencies in data.items():
+            if operation_class in self._latencies:
+                self._latencies[operation_class].extend(latencies)
+
+    def as_dict(self) -> dict:
+        # Milliseconds are precise enough and keep the stored data small
+        return {
+            operation_class: [round(latency, 3) for latency in latencies]
+            for operation_class, latencies in self._latencies.items()
+        }
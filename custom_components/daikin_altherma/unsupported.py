@@ -0,0 +1,81 @@
+"""Resources which the adapter does not support, so they are not requested on every update."""
+from __future__ import annotations
+
+import logging
+import time
+
+from pyaltherma.utils import query_object
+
+from .const import UNSUPPORTED_RETRY_SECONDS
+
+_LOGGER = logging.getLogger(__name__)
+
+RSC_NOT_FOUND = 4004
+# Marks a not found answer of the cache, the adapter was not asked
+CACHED = 'cached'
+
+
+def not_found_response(dest: str) -> dict:
+    """Response of the adapter to a request of a resource which does not exist, answered from the cache."""
+    return {'m2m:rsp': {'rsc': RSC_NOT_FOUND, 'to': '/S', 'fr': dest, CACHED: True}}
+
+
+def is_cached(response) -> bool:
+    """True if the response is a not found answer of the cache instead of the adapter."""
+    return isinstance(response, dict) and query_object(response, f'm2m:rsp/{CACHED}') is True
+
+
+def _rsc(response):
+    return query_object(response, 'm2m:rsp/rsc') if isinstance(response, dict) else None
+
+
+def _not_found(response) -> bool:
+    return _rsc(response) == RSC_NOT_FOUND
+
+
+def _valid(response) -> bool:
+    rsc = _rsc(response)
+    return rsc is not None and rsc < 4000 and query_object(response, 'm2m:rsp/pc/m2m:cin/con') not in (None, '')
+
+
+class UnsupportedResources:
+    """
+    Latest value reads (.../la) which the adapter answered with not found and which never had a valid answer.
+    They are answered with not found from the cache without a request and requested again every retry seconds.
+    Other error codes, empty or undecodable answers and timeouts are not recorded, they are usually transient.
+    """
+
+    def __init__(self, resources=(), retry: float = UNSUPPORTED_RETRY_SECONDS):
+        self._retry = retry
+        retry_at = time.monotonic() + retry
+        self._retry_at = {dest: retry_at for dest in resources}
+        # Reads which had a valid answer, a later not found of them is not cached
+        self._supported = set()
+
+    def skip(self, dest: str) -> bool:
+        retry_at = self._retry_at.get(dest)
+        if retry_at is None:
+            return False
+        now = time.monotonic()
+        if now < retry_at:
+            return True
+        # The next answer decides whether it is still unsupported, until then it is not requested again
+        self._retry_at[dest] = now + self._retry
+        return False
+
+    def record(self, dest: str, response):
+        if not dest.endswith('/la'):
+            return
+        if _valid(response):
+            self._supported.add(dest)
+            if self._retry_at.pop(dest, None) is not None:
+                _LOGGER.debug(f'{dest} is supported by the adapter again')
+        elif _not_found(response) and dest not in self._supported and dest not in self._retry_at:
+            _LOGGER.debug(f'{dest} is not supported by the adapter, it is requested again in {self._retry}s')
+            self._retry_at[dest] = time.monotonic() + self._retry
+
+    def __len__(self):
+        return len(self._retry_at)
+
+    def as_list(self) -> list:
+        return sorted(self._retry_at)
@@ -7,11 +7,11 @@ from homeassistant.components.water_heater import (
     WaterHeaterEntityFeature
 )
 from homeassistant.const import UnitOfTemperature, ATTR_TEMPERATURE
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
-)
+from homeassistant.core import callback
 
-from . import DOMAIN, AlthermaAPI
+from .api import AlthermaAPI
+from .const import DOMAIN
+from .entity import AlthermaEntity, Deadband
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -26,19 +26,19 @@ async def async_setup_entry(hass, entry, async_add_entities):
     """Set up Daikin climate based on config_entry."""
     api = hass.data[DOMAIN].get(entry.entry_id)
     if api.HWT_device_info is not None:
-        coordinator = hass.data[DOMAIN]['coordinator']
+        coordinator = api.channel(api.device.hot_water_tank.unit_function)
         async_add_entities([AlthermaWaterHeater(coordinator, api)], update_before_add=False)
     else:
         _LOGGER.warning(f'Cannot find daikin hot water tank unit.')
 
 
-class AlthermaWaterHeater(WaterHeaterEntity, CoordinatorEntity):
+class AlthermaWaterHeater(WaterHeaterEntity, AlthermaEntity):
     _attr_temperature_unit = UnitOfTemperature.CELSIUS
     _attr_operation_list = OPERATION_LIST
     _attr_supported_features = SUPPORT_FLAGS_HEATER
 
     def __init__(self, coordinator, api: AlthermaAPI):
-        super().__init__(coordinator)
+        super().__init__(coordinator, api)
         self._attr_name = "Domestic Hot Water Tank"
         self._attr_operation_list = OPERATION_LIST
         device = api.device
@@ -46,13 +46,15 @@ class AlthermaWaterHeater(WaterHeaterEntity, CoordinatorEntity):
         if not self.powerful_support:
             self._attr_operation_list = OPERATION_LIST_NO_PERF
         self._attr_device_info = api.HWT_device_info
-        self._api = api
         self._attr_unique_id = f"{self._api.info['serial_number']}-heater"
         self._attr_icon = 'mdi:bathtub-outline'
+        self._deadband = Deadband()
+        self._deadband.update(self._tank_temperature(), *self._api.deadband)
 
-    @property
-    def device_info(self):
-        return self._attr_device_info
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        self._deadband.update(self._tank_temperature(), *self._api.deadband)
+        super()._handle_coordinator_update()
 
     async def async_set_temperature(self, **kwargs):
         target_temperature = kwargs.get(ATTR_TEMPERATURE)
@@ -105,7 +107,7 @@ class AlthermaWaterHeater(WaterHeaterEntity, CoordinatorEntity):
         status = self._get_status()
         operations = status["operations"]
         
-        if "DomesticHotWaterTemperatureHeating":
+        if "DomesticHotWaterTemperatureHeating" in operations:
             return operations["DomesticHotWaterTemperatureHeating"]
         elif "TargetTemperature" in operations:
             return operations["TargetTemperature"]
@@ -114,6 +116,9 @@ class AlthermaWaterHeater(WaterHeaterEntity, CoordinatorEntity):
 
     @property
     def current_temperature(self) -> float:
+        return self._deadband.value
+
+    def _tank_temperature(self) -> float:
         status = self._get_status()
         if "sensors" in status:
             sensors = status["sensors"]
@@ -147,13 +152,6 @@ class AlthermaWaterHeater(WaterHeaterEntity, CoordinatorEntity):
             return self._api.water_tank_target_temp_config["maxValue"]
         return None
 
-    async def async_update(self):
-        await self._api.async_update()
-
-    @property
-    def available(self):
-        return self._api.available
-
     async def async_turn_on(self, **kwargs) -> None:
         await self.async_set_operation_mode(STATE_ON)
 
@@ -0,0 +1,7 @@
+"""Development tools for the Daikin Altherma integration: command line poller, stand-in adapter, traffic capture
+and benchmarks. They are not part of the integration which is installed into Home Assistant.
+
+Run them from the root of the repository, for example ``python -m tools.cli --help``.
+"""
+
+INTEGRATION_PACKAGE = 'custom_components.daikin_altherma'
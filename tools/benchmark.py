@@ -0,0 +1,228 @@
+"""Offline benchmarks of the entity properties which Home Assistant evaluates on every state write, and of the
+setup of every model in the fixture corpus.
+
+The entities of every platform are built from an AlthermaAPI, usually of a fixture served by the simulator,
+with a Home Assistant instance which is not started. A tick calculates the state and the attributes of all the
+entities, as a state write does after an update.
+"""
+from __future__ import annotations
+
+import importlib
+import json
+import os
+import time
+from types import SimpleNamespace
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.daikin_altherma import PLATFORMS, create_channels
+from custom_components.daikin_altherma.const import DOMAIN, DEFAULT_OPTIONS
+from custom_components.daikin_altherma.operations import build_operation_table
+
+from . import INTEGRATION_PACKAGE
+from .simulator import AdapterSimulator, load_fixture
+
+BENCH_ENTRY_ID = 'benchmark'
+TICK = 'tick'
+# Properties of the Home Assistant base classes which a state write evaluates
+STATE_PROPERTIES = ['available', 'state', 'state_attributes', 'extra_state_attributes']
+
+# Key of a thresholds file: duration in microseconds of the calibration workload on the machine which measured them
+CALIBRATION = 'calibration'
+CALIBRATION_ROUNDS = 50
+
+# The manifest of the fixture corpus: version and fixture file -> description of the model
+CORPUS_MANIFEST = 'corpus.json'
+# Steps of the setup benchmark, timed separately
+DISCOVERY = 'discovery'
+INIT = 'init'
+ENTITIES = 'entities'
+# Requests to the adapter of one setup
+REQUESTS = 'requests'
+
+
+async def async_build_entities(hass: HomeAssistant, api) -> list:
+    """Entities of every platform for the units of the API, as the integration setup creates them."""
+    api.operation_table = build_operation_table(api.device)
+    create_channels(hass, api, None, DEFAULT_OPTIONS)
+    hass.data.setdefault(DOMAIN, {})[BENCH_ENTRY_ID] = api
+    entry = SimpleNamespace(entry_id=BENCH_ENTRY_ID)
+    entities = []
+    for platform in PLATFORMS:
+        module = importlib.import_module(f'{INTEGRATION_PACKAGE}.{platform}')
+        await module.async_setup_entry(hass, entry, lambda new_entities, update_before_add=False: entities.extend(new_entities))
+    for entity in entities:
+        entity.hass = hass
+    return entities
+
+
+def _entity_properties(entity) -> list:
+    """Properties defined by the integration classes of the entity, followed by the state properties."""
+    names = []
+    for cls in type(entity).__mro__:
+        if not cls.__module__.startswith(INTEGRATION_PACKAGE):
+            continue
+        for name, value in vars(cls).items():
+            if isinstance(value, property) and not name.startswith('_') and name not in names:
+                names.append(name)
+    return names + [name for name in STATE_PROPERTIES if name not in names]
+
+
+def time_entities(entities: list, ticks: int) -> dict:
+    """
+    Times every property of every entity and a tick over all the entities.
+    @return: 'tick' and '<entity class>.<property>' -> list of durations in seconds
+    """
+    durations = {TICK: []}
+    properties = [(entity, _entity_properties(entity)) for entity in entities]
+    for _ in range(ticks):
+        start = time.perf_counter()
+        for entity in entities:
+            entity._async_calculate_state()
+        durations[TICK].append(time.perf_counter() - start)
+
+        for entity, names in properties:
+            for name in names:
+                start = time.perf_counter()
+                try:
+                    getattr(entity, name)
+                except Exception:
+                    # A property which fails for the fixture is left out, the tick shows the cost of the failure
+                    continue
+                durations.setdefault(f'{type(entity).__name__}.{name}', []).append(time.perf_counter() - start)
+    return durations
+
+
+def calibrate() -> float:
+    """
+    Shortest duration in microseconds of a fixed workload of dictionary lookups, rounding and formatting, the work
+    of the entity properties. It is measured in the same run as the benchmark and scales the thresholds to the speed
+    of the machine.
+    """
+    values = {f'sensor{i}': i / 3 for i in range(200)}
+    shortest = None
+    for _ in range(CALIBRATION_ROUNDS):
+        start = time.perf_counter()
+        for name in values:
+            f'{name}={round(values[name], 2)}'
+        duration = time.perf_counter() - start
+        shortest = duration if shortest is None else min(shortest, duration)
+    return shortest * 1e6
+
+
+def load_thresholds(path: str) -> dict:
+    """
+    Thresholds file: 'tick' and '<entity class>.<property>' -> maximum mean duration in microseconds, and
+    'calibration' -> the result of calibrate on the machine which measured them.
+    """
+    with open(path) as f:
+        return json.load(f)
+
+
+def scale_thresholds(thresholds: dict, calibration: float, counts: tuple = ()) -> dict:
+    """
+    Durations of the thresholds scaled from the calibration of the file to the calibration of this run. A file
+    without calibration is used as is.
+    @param counts: suffixes of the thresholds which are counts, not durations, and are not scaled
+    """
+    reference = thresholds.get(CALIBRATION)
+    factor = calibration / reference if reference else 1
+    return {
+        name: limit if name.endswith(counts) else limit * factor
+        for name, limit in thresholds.items() if name != CALIBRATION
+    }
+
+
+def check_thresholds(means: dict, thresholds: dict) -> list:
+    """@return: descriptions of the mean durations in microseconds above their threshold"""
+    return [
+        f'{name}: {means[name]:.1f}us > {limit:.1f}us'
+        for name, limit in thresholds.items()
+        if name in means and means[name] > limit
+    ]
+
+
+def load_corpus(directory: str) -> tuple:
+    """@return: version of the corpus and fixture name -> path, in the order of the manifest"""
+    with open(os.path.join(directory, CORPUS_MANIFEST)) as f:
+        manifest = json.load(f)
+    return manifest['version'], {
+        os.path.splitext(name)[0]: os.path.join(directory, name)
+        for name in manifest['fixtures']
+    }
+
+
+async def time_setup(hass: HomeAssistant, session, fixture: dict, iterations: int) -> dict:
+    """
+    Sets up the API and the entities of a fixture served by the simulator, as the integration setup does.
+    @return: 'discovery', 'init' and 'entities' -> list of durations in seconds, 'requests' -> list of the requests
+    to the adapter of every setup
+    """
+    # Imported here, the entities benchmark does not import pyaltherma
+    from custom_components.daikin_altherma.api import AlthermaAPI
+    from custom_components.daikin_altherma.connection import AlthermaConnection
+    from custom_components.daikin_altherma.controller import AlthermaDeviceController
+    from custom_components.daikin_altherma.metrics import AdapterMetrics
+    from custom_components.daikin_altherma.timeouts import AdaptiveTimeouts
+
+    results = {DISCOVERY: [], INIT: [], ENTITIES: [], REQUESTS: []}
+    simulator = AdapterSimulator(fixture)
+    await simulator.start()
+    try:
+        for _ in range(iterations):
+            requests = simulator.request_count
+            metrics = AdapterMetrics()
+            timeouts = AdaptiveTimeouts()
+            device = AlthermaDeviceController(
+                AlthermaConnection(session, simulator.address, metrics=metrics, timeouts=timeouts))
+            start = time.perf_counter()
+            await device.discover_units()
+            results[DISCOVERY].append(time.perf_counter() - start)
+
+            api = AlthermaAPI(device, metrics, timeouts)
+            start = time.perf_counter()
+            await api.api_init()
+            results[INIT].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            await async_build_entities(hass, api)
+            results[ENTITIES].append(time.perf_counter() - start)
+            results[REQUESTS].append(simulator.request_count - requests)
+            await device.ws_connection.close()
+    finally:
+        await simulator.stop()
+    return results
+
+
+async def async_time_corpus(hass: HomeAssistant, session, directory: str, iterations: int) -> tuple:
+    """@return: version of the corpus and fixture name -> results of time_setup"""
+    version, fixtures = load_corpus(directory)
+    return version, {
+        name: await time_setup(hass, session, load_fixture(path), iterations)
+        for name, path in fixtures.items()
+    }
+
+
+def check_setup_thresholds(results: dict, thresholds: dict) -> list:
+    """
+    Thresholds of the setup benchmark: '<step>' or '<fixture>.<step>' -> maximum mean duration in microseconds,
+    and 'requests' or '<fixture>.requests' -> maximum requests of one setup. A fixture threshold wins. The request
+    counts do not depend on the machine and are not scaled by the calibration.
+    @param results: fixture name -> results of time_setup
+    @return: descriptions of the values above their threshold
+    """
+    regressions = []
+    for name, values in results.items():
+        for step in (DISCOVERY, INIT, ENTITIES, REQUESTS):
+            limit = thresholds.get(f'{name}.{step}', thresholds.get(step))
+            if limit is None or not values[step]:
+                continue
+            if step == REQUESTS:
+                value = max(values[step])
+                if value > limit:
+                    regressions.append(f'{name}.{step}: {value} > {limit}')
+            else:
+                mean = sum(values[step]) / len(values[step]) * 1e6
+                if mean > limit:
+                    regressions.append(f'{name}.{step}: {mean:.1f}us > {limit:.1f}us')
+    return regressions
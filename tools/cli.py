@@ -0,0 +1,400 @@
+"""Command line poller and benchmark tool for the Daikin Altherma adapter.
+
+It builds the same AlthermaAPI object as the integration, but without a running Home Assistant
+instance. Examples:
+
+    python -m tools.cli --host 192.168.1.10 poll --interval 5
+    python -m tools.cli --host 192.168.1.10 dump --output unit.json
+    python -m tools.cli --simulate unit.json bench poll --iterations 50
+    python -m tools.cli --host 192.168.1.10 --capture unit.jsonl.gz poll --count 20
+    python -m tools.cli --replay unit.jsonl.gz --realtime bench poll --iterations 20
+    python -m tools.cli scan 192.168.1.0/24
+    python -m tools.cli --simulate benchmarks/fixtures/brp069a62.json bench entities
+    python -m tools.cli bench setup --corpus benchmarks/fixtures
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import sys
+import tempfile
+import time
+
+import aiohttp
+from pyaltherma.errors import AlthermaException
+
+from custom_components.daikin_altherma.api import AlthermaAPI, async_create_api
+from custom_components.daikin_altherma.connection import AlthermaConnection
+from custom_components.daikin_altherma.const import IDENTIFYING_DEVICE_INFO, SCAN_CONCURRENCY
+from custom_components.daikin_altherma.metrics import summarize
+from custom_components.daikin_altherma.scanner import async_scan
+
+from . import INTEGRATION_PACKAGE
+from .recording import ReplayConnection, TrafficLog, TrafficRecorder
+from .simulator import AdapterSimulator, load_fixture
+
+_LOGGER = logging.getLogger(__name__)
+
+UNIT_INFO_PROPERTIES = ['ModelNumber', 'Version/IndoorSoftware', 'Version/OutdoorSoftware']
+COMMAND_VISIBLE_TIMEOUT_SECONDS = 30
+# Pause between the reads which wait for a written value, so the benchmark does not flood the adapter
+COMMAND_VISIBLE_POLL_SECONDS = 0.2
+
+
+async def async_build_fixture(api: AlthermaAPI) -> dict:
+    """Collects device info, unit profiles and the last status in the format served by the simulator."""
+    device = api.device
+    units = []
+    for profile in device.profiles:
+        controller = device.altherma_units[profile['label']]
+        info = {}
+        for prop in UNIT_INFO_PROPERTIES:
+            try:
+                value = await controller.read(query_type='UnitInfo', prop=prop)
+            except AlthermaException:
+                value = None
+            if value is not None:
+                info[prop] = value
+        units.append({
+            'idx': profile['idx'],
+            'label': profile['label'],
+            'unit_name': profile['unit_name'],
+            'profile': profile['profile'],
+            'info': info,
+            'status': api.status.get(profile['label'], {}),
+        })
+    await device.ws_connection.close()
+    return {'device_info': api.info, 'units': units}
+
+
+def _print_summary(title: str, durations):
+    stats = summarize(durations)
+    if stats['count'] == 0:
+        print(f'{title}: no samples')
+        return
+    values = ' '.join(f'{key}={value * 1000:.1f}ms' for key, value in stats.items() if key != 'count')
+    print(f'{title} (n={stats["count"]}): {values}')
+
+
+async def _create_api(session, host, args) -> AlthermaAPI:
+    return await async_create_api(session, host, connection_factory=args.connection_factory)
+
+
+async def _timed(coro) -> float:
+    start = time.perf_counter()
+    await coro
+    return time.perf_counter() - start
+
+
+async def cmd_poll(session, host, args) -> int:
+    api = await _create_api(session, host, args)
+    durations = []
+    polls = 0
+    try:
+        while args.count == 0 or polls < args.count:
+            duration = await _timed(api.async_update())
+            polls += 1
+            durations.append(duration)
+            print(f'poll {polls}: {duration * 1000:.1f}ms available={api.available}')
+            if args.verbose:
+                print(json.dumps(api.status, indent=2))
+            await asyncio.sleep(max(args.interval - duration, 0))
+    finally:
+        _print_summary('poll', durations)
+        if args.verbose:
+            timeouts = ', '.join(f'{operation_class}={api.timeouts.timeout(operation_class):.2f}s'
+                                 for operation_class in api.timeouts.as_dict())
+            print(f'timeouts: {timeouts}')
+            print(f'unsupported resources: {api.unsupported.as_list()}')
+    return 0
+
+
+async def cmd_dump(session, host, args) -> int:
+    api = await _create_api(session, host, args)
+    fixture = await async_build_fixture(api)
+    if args.anonymize:
+        # Zeros of the same length, so the dump keeps the format of the values
+        fixture['device_info'] = {
+            key: '0' * len(str(value)) if key in IDENTIFYING_DEVICE_INFO and value is not None else value
+            for key, value in fixture['device_info'].items()
+        }
+    output = json.dumps(fixture, indent=2)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(output)
+        print(f'Status and profiles of {len(fixture["units"])} units written to {args.output}')
+    return 0
+
+
+async def _bench_discovery(session, host, args):
+    durations = []
+    for _ in range(args.iterations):
+        start = time.perf_counter()
+        api = await _create_api(session, host, args)
+        durations.append(time.perf_counter() - start)
+        await api.device.ws_connection.close()
+    _print_summary('discovery', durations)
+
+
+async def _bench_poll(session, host, args):
+    api = await _create_api(session, host, args)
+    durations = []
+    for _ in range(args.iterations):
+        durations.append(await _timed(api.async_update()))
+        if not api.available:
+            _LOGGER.warning('Poll failed, the adapter is not available.')
+    _print_summary('poll', durations)
+
+
+def _operation_value(controller, operation: str, value: str):
+    """
+    Converts the --value of an operation as its entity does: a float for an operation with a value range in the unit
+    profile, the string for one with a list of options.
+    """
+    key = 'powerful' if operation == 'Powerful' else operation
+    config = controller.unit.operation_config.get(key)
+    if isinstance(config, dict) and isinstance(config.get('heating'), dict):
+        config = config['heating']
+    if isinstance(config, dict) and 'minValue' in config:
+        return float(value)
+    return value
+
+
+def _same_value(read, value) -> bool:
+    if isinstance(value, float):
+        try:
+            return float(read) == value
+        except (TypeError, ValueError):
+            return False
+    return str(read) == str(value)
+
+
+async def _bench_command(session, host, args):
+    api = await _create_api(session, host, args)
+    controller = api.device.altherma_units.get(args.unit_function)
+    if controller is None:
+        raise SystemExit(f'Unit {args.unit_function} not found. Available: {list(api.device.altherma_units)}')
+    if args.value is not None:
+        value = _operation_value(controller, args.operation, args.value)
+    else:
+        # Write back the current value so the benchmark does not change the unit settings
+        value = api.status[args.unit_function]['operations'][args.operation]
+
+    acknowledged, visible = [], []
+    for _ in range(args.iterations):
+        start = time.perf_counter()
+        await controller.call_operation(args.operation, value, validate=False)
+        acknowledged.append(time.perf_counter() - start)
+        while not _same_value(await controller.read_operation(args.operation), value):
+            if time.perf_counter() - start > COMMAND_VISIBLE_TIMEOUT_SECONDS:
+                raise SystemExit(f'{args.operation} did not change to {value}')
+            await asyncio.sleep(COMMAND_VISIBLE_POLL_SECONDS)
+        visible.append(time.perf_counter() - start)
+    await api.device.ws_connection.close()
+    _print_summary('command acknowledged', acknowledged)
+    _print_summary('command visible', visible)
+
+
+# Modules which Home Assistant has loaded before it imports the integration
+IMPORT_PRELOAD = 'import aiohttp, homeassistant.config_entries, homeassistant.helpers.update_coordinator, ' \
+                 'homeassistant.helpers.storage'
+IMPORT_TIMED = 'import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)'
+
+
+async def _import_time(module: str, preload: str) -> float:
+    """Time of importing the module in a new interpreter, after the preload statement."""
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, '-c', f'{preload}; {IMPORT_TIMED.format(module=module)}',
+        stdout=asyncio.subprocess.PIPE,
+    )
+    stdout, _ = await process.communicate()
+    if process.returncode != 0:
+        raise SystemExit(f'Failed to import {module}')
+    return float(stdout.decode().strip().splitlines()[-1])
+
+
+async def _bench_import(session, host, args):
+    package = INTEGRATION_PACKAGE
+    integration, setup = [], []
+    for _ in range(args.iterations):
+        integration.append(await _import_time(package, IMPORT_PRELOAD))
+        # The API with pyaltherma is imported when the first entry is set up
+        setup.append(await _import_time(f'{package}.api', f'{IMPORT_PRELOAD}; import {package}'))
+    _print_summary('import integration', integration)
+    _print_summary('import api on setup', setup)
+
+
+async def _bench_entities(session, host, args):
+    # Imported here, the other commands do not build a Home Assistant instance
+    from homeassistant.core import HomeAssistant
+    from .benchmark import (TICK, async_build_entities, calibrate, check_thresholds, load_thresholds,
+                            scale_thresholds, time_entities)
+
+    api = await _create_api(session, host, args)
+    await api.async_update()
+    await api.device.ws_connection.close()
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        entities = await async_build_entities(hass, api)
+        durations = time_entities(entities, args.iterations)
+    means = {name: sum(values) / len(values) * 1e6 for name, values in durations.items()}
+    _print_summary(f'tick of {len(entities)} entities', durations.pop(TICK))
+    for name in sorted(durations, key=means.get, reverse=True):
+        print(f'{name}: mean={means[name]:.1f}us')
+    if args.thresholds is not None:
+        calibration = calibrate()
+        print(f'calibration: {calibration:.1f}us')
+        regressions = check_thresholds(means, scale_thresholds(load_thresholds(args.thresholds), calibration))
+        for regression in regressions:
+            print(f'regression {regression}')
+        if regressions:
+            raise SystemExit(1)
+
+
+async def _bench_setup(session, host, args):
+    # Imported here, the other commands do not build a Home Assistant instance
+    from homeassistant.core import HomeAssistant
+    from .benchmark import (REQUESTS, async_time_corpus, calibrate, check_setup_thresholds, load_thresholds,
+                            scale_thresholds)
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        version, results = await async_time_corpus(hass, session, args.corpus, args.iterations)
+    print(f'corpus {args.corpus} version {version}')
+    for name, values in results.items():
+        requests = values.pop(REQUESTS)
+        for step, durations in values.items():
+            _print_summary(f'{name} {step}', durations)
+        print(f'{name} requests={max(requests)}')
+        values[REQUESTS] = requests
+    if args.thresholds is not None:
+        calibration = calibrate()
+        print(f'calibration: {calibration:.1f}us')
+        thresholds = scale_thresholds(load_thresholds(args.thresholds), calibration, counts=(REQUESTS,))
+        regressions = check_setup_thresholds(results, thresholds)
+        for regression in regressions:
+            print(f'regression {regression}')
+        if regressions:
+            raise SystemExit(1)
+
+
+async def cmd_bench(session, host, args) -> int:
+    benchmarks = {
+        'discovery': _bench_discovery,
+        'poll': _bench_poll,
+        'command': _bench_command,
+        'import': _bench_import,
+        'entities': _bench_entities,
+        'setup': _bench_setup,
+    }
+    await benchmarks[args.benchmark](session, host, args)
+    return 0
+
+
+async def cmd_scan(session, host, args) -> int:
+    start = time.perf_counter()
+    found = await async_scan(session, args.network, port=args.port, concurrency=args.concurrency)
+    for info in found:
+        print(f"{info['host']}: {info['manufacturer']} {info['duty']} serial={info['serial_number']} "
+              f"firmware={info['firmware']}")
+    print(f'{len(found)} adapters found in {args.network} in {time.perf_counter() - start:.1f}s')
+    return 0
+
+
+async def async_main(args) -> int:
+    simulator = None
+    recorder = None
+    host = args.host
+    args.connection_factory = AlthermaConnection
+    if args.simulate is not None:
+        simulator = AdapterSimulator(load_fixture(args.simulate), latency=args.latency / 1000)
+        await simulator.start()
+        host = simulator.address
+    if args.replay is not None:
+        log = TrafficLog.load(args.replay)
+        host = log.header.get('host') or 'replay'
+        args.connection_factory = functools.partial(ReplayConnection, log=log, realtime=args.realtime)
+    if args.capture is not None:
+        recorder = TrafficRecorder(args.capture, host)
+        args.connection_factory = functools.partial(args.connection_factory, recorder=recorder)
+    try:
+        async with aiohttp.ClientSession() as session:
+            return await args.func(session, host, args)
+    finally:
+        if simulator is not None:
+            await simulator.stop()
+            print(f'Simulated adapter served {simulator.request_count} requests')
+        if recorder is not None:
+            recorder.close()
+            print(f'{recorder.exchanges} exchanges captured to {recorder.path}')
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Poll and benchmark a Daikin Altherma LAN adapter.')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--host', help='address of the adapter')
+    target.add_argument('--simulate', metavar='FIXTURE', help='serve a dump file from a local stand-in adapter')
+    target.add_argument('--replay', metavar='CAPTURE', help='answer the requests from a capture without a network')
+    parser.add_argument('--capture', metavar='FILE',
+                        help='write every request and response to a capture, gzip compressed if it ends with .gz')
+    parser.add_argument('--realtime', action='store_true', help='replay the captured latency of every request')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='added latency per request of the stand-in adapter in milliseconds')
+    parser.add_argument('-v', '--verbose', action='store_true', help='print debug output')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    poll = commands.add_parser('poll', help='poll the status at a given interval')
+    poll.add_argument('--interval', type=float, default=5.0, help='seconds between polls')
+    poll.add_argument('--count', type=int, default=0, help='number of polls, 0 polls until interrupted')
+    poll.set_defaults(func=cmd_poll)
+
+    dump = commands.add_parser('dump', help='dump the status and unit profiles')
+    dump.add_argument('--output', help='file to write, defaults to stdout')
+    dump.add_argument('--anonymize', action='store_true',
+                      help='replace the serial number and the microcontroller id, for example to add it to the corpus')
+    dump.set_defaults(func=cmd_dump)
+
+    bench = commands.add_parser(
+        'bench', help='measure discovery, polling, command latency, import time, entity state calculation or the '
+                      'setup of every model in the corpus')
+    bench.add_argument('benchmark', choices=['discovery', 'poll', 'command', 'import', 'entities', 'setup'])
+    bench.add_argument('--iterations', type=int, default=10)
+    bench.add_argument('--unit-function', default='function/SpaceHeating', help='unit used by the command benchmark')
+    bench.add_argument('--operation', default='Power', help='operation written by the command benchmark')
+    bench.add_argument('--value', help='value to write, defaults to the current value')
+    bench.add_argument('--thresholds', metavar='FILE',
+                       help='maximum mean durations of the entities or setup benchmark, exits with 1 if one is '
+                            'exceeded')
+    bench.add_argument('--corpus', metavar='DIR', default='benchmarks/fixtures',
+                       help='fixtures and their corpus.json manifest used by the setup benchmark')
+    bench.set_defaults(func=cmd_bench)
+
+    scan = commands.add_parser('scan', help='scan a network range for adapters')
+    scan.add_argument('network', help='network range, for example 192.168.1.0/24')
+    scan.add_argument('--port', type=int, default=80)
+    scan.add_argument('--concurrency', type=int, default=SCAN_CONCURRENCY, help='probes at the same time')
+    scan.set_defaults(func=cmd_scan)
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    # The setup benchmark serves the fixtures of the corpus itself
+    without_adapter = args.command == 'scan' or (args.command == 'bench' and args.benchmark in ('import', 'setup'))
+    if not without_adapter and args.host is None and args.simulate is None and args.replay is None:
+        parser.error('one of the arguments --host --simulate --replay is required')
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+    try:
+        return asyncio.run(async_main(args))
+    except KeyboardInterrupt:
+        return 130
+
+
+if __name__ == '__main__':
+    sys.exit(main())
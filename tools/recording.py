@@ -0,0 +1,130 @@
+"""Capture of the adapter traffic and its replay without a network.
+
+A capture is a JSON lines file, gzip compressed if the name ends with .gz. The first line is a header,
+every other line is one exchange: [start, latency, dest, payload, response] with the times in seconds
+relative to the start of the capture.
+"""
+from __future__ import annotations
+
+import asyncio
+import copy
+import gzip
+import json
+import logging
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+
+from pyaltherma.errors import AlthermaException
+
+from custom_components.daikin_altherma.connection import AlthermaConnection
+
+_LOGGER = logging.getLogger(__name__)
+
+CAPTURE_VERSION = 1
+
+
+class ReplayError(AlthermaException):
+    """The replayed capture has no response for a request."""
+
+
+def _open(path: str, mode: str):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def _request_key(dest: str, payload) -> tuple:
+    return dest, json.dumps(payload, sort_keys=True, separators=(',', ':'))
+
+
+class TrafficRecorder:
+    """Writes the requests and responses of an AlthermaConnection to a capture file."""
+
+    def __init__(self, path: str, host: str = None):
+        self.path = path
+        self._started = time.monotonic()
+        self._file = _open(path, 'w')
+        self.exchanges = 0
+        self._write({
+            'version': CAPTURE_VERSION,
+            'host': host,
+            'captured': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        })
+
+    def record(self, started: float, latency: float, dest: str, payload, response):
+        """
+        Records one exchange.
+        @param started: time.monotonic() when the request was sent
+        @param latency: seconds until the response was received
+        @param response: decoded response, None if no response was awaited
+        """
+        self._write([round(started - self._started, 4), round(latency, 4), dest, payload, response])
+        self.exchanges += 1
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry, separators=(',', ':')))
+        self._file.write('\n')
+
+    def close(self):
+        self._file.close()
+
+
+class TrafficLog:
+    """Exchanges of a capture file, grouped by request."""
+
+    def __init__(self, header: dict, exchanges: list):
+        self.header = header
+        self.exchanges = exchanges
+        self._pending = defaultdict(deque)
+        self._last = {}
+        for exchange in exchanges:
+            self._pending[_request_key(exchange[2], exchange[3])].append(exchange)
+
+    @classmethod
+    def load(cls, path: str) -> TrafficLog:
+        with _open(path, 'r') as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+        if not lines or not isinstance(lines[0], dict) or lines[0].get('version') != CAPTURE_VERSION:
+            raise ValueError(f'{path} is not a capture of version {CAPTURE_VERSION}')
+        return cls(lines[0], lines[1:])
+
+    def next_exchange(self, dest: str, payload) -> list:
+        """
+        Returns the next recorded exchange of the request. Requests are answered in the order
+        they were captured, once all the responses are used the last one is repeated.
+        """
+        key = _request_key(dest, payload)
+        pending = self._pending.get(key)
+        if pending:
+            self._last[key] = pending.popleft()
+        if key not in self._last:
+            raise ReplayError(f'No response captured for {dest} {payload}')
+        return self._last[key]
+
+
+class ReplayConnection(AlthermaConnection):
+    """
+    AlthermaConnection which answers the requests from a capture instead of the adapter.
+    With realtime the captured latency of every exchange is replayed as well.
+    """
+
+    def __init__(self, session, host, timeout=None, metrics=None, timeouts=None, log: TrafficLog = None,
+                 realtime: bool = False, **kwargs):
+        super().__init__(session, host, timeout, metrics=metrics, timeouts=timeouts, **kwargs)
+        self.log = log
+        self.realtime = realtime
+
+    async def connect(self):
+        self.metrics.record_connect()
+
+    async def _request(self, dest, payload=None, wait_for_response=True, assert_response_fn=None):
+        exchange = self.log.next_exchange(dest, payload)
+        if self.realtime:
+            await asyncio.sleep(exchange[1])
+        if not wait_for_response:
+            return None
+        response = copy.deepcopy(exchange[4])
+        if callable(assert_response_fn):
+            assert_response_fn(response)
+        return response
@@ -0,0 +1,188 @@
+"""Local stand-in for the Daikin Altherma LAN adapter.
+
+It serves the websocket protocol used by pyaltherma from a fixture file, which is the
+output of the ``dump`` command of the command line tool. Run it with:
+
+    python -m tools.simulator fixture.json --port 8080
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import copy
+import json
+import logging
+
+from aiohttp import WSMsgType, web
+
+_LOGGER = logging.getLogger(__name__)
+
+RSC_OK = 2000
+RSC_CREATED = 2001
+RSC_NOT_FOUND = 4004
+
+DEVICE_INFO_FIELDS = {
+    'serial_number': 'dlb',
+    'manufacturer': 'man',
+    'model_name': 'mod',
+    'duty': 'dty',
+    'miconID': 'fwv',
+    'firmware': 'swv',
+}
+
+
+def load_fixture(path) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+class AdapterSimulator:
+    """Serves a fixture over the adapter websocket protocol at ws://{address}/mca"""
+
+    def __init__(self, fixture: dict, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0):
+        self._fixture = copy.deepcopy(fixture)
+        self._units = {unit['idx']: unit for unit in self._fixture['units']}
+        self._host = host
+        self._port = port
+        self._latency = latency
+        self._runner = None
+        self.request_count = 0
+
+    @property
+    def address(self) -> str:
+        """Host and port which can be passed as the adapter host."""
+        return f'{self._host}:{self._port}'
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/mca', self._handle_ws)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self._host, self._port)
+        await site.start()
+        if self._port == 0:
+            self._port = self._runner.addresses[0][1]
+        _LOGGER.info(f'Simulated adapter is listening on ws://{self.address}/mca')
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.stop()
+
+    async def _handle_ws(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                continue
+            self.request_count += 1
+            if self._latency > 0:
+                await asyncio.sleep(self._latency)
+            response = self.handle_request(json.loads(msg.data))
+            await ws.send_str(json.dumps(response))
+        return ws
+
+    def handle_request(self, message: dict) -> dict:
+        rqp = message.get('m2m:rqp', {})
+        dest = rqp.get('to', '')
+        rsc, pc = self._route(dest.lstrip('/'), rqp)
+        response = {'rsc': rsc, 'rqi': rqp.get('rqi'), 'to': rqp.get('fr'), 'fr': dest}
+        if pc is not None:
+            response['pc'] = pc
+        return {'m2m:rsp': response}
+
+    def _route(self, dest: str, rqp: dict):
+        parts = dest.split('/')
+        if dest == '[0]/MNCSE-node/deviceInfo':
+            info = self._fixture['device_info']
+            return RSC_OK, {'m2m:dvi': {key: info.get(name) for name, key in DEVICE_INFO_FIELDS.items()}}
+
+        if len(parts) < 3 or parts[1] != 'MNAE' or not parts[2].isdigit():
+            return RSC_NOT_FOUND, None
+        unit = self._units.get(int(parts[2]))
+        if unit is None:
+            return RSC_NOT_FOUND, None
+        if len(parts) == 3:
+            return RSC_OK, {'m2m:cnt': {'lbl': unit['label']}}
+
+        if rqp.get('op') == 1:
+            return self._write(unit, parts[3:], rqp)
+
+        if parts[-1] != 'la':
+            return RSC_NOT_FOUND, None
+        found, value = self._read(unit, parts[3:-1])
+        if not found:
+            return RSC_NOT_FOUND, None
+        return RSC_OK, {'m2m:cin': {'con': value, 'cnf': 'text/plain:0'}}
+
+    def _read(self, unit: dict, resource: list):
+        status = unit.get('status', {})
+        query_type = resource[0]
+        prop = '/'.join(resource[1:])
+        if query_type == 'UnitProfile':
+            return True, json.dumps(unit['profile'])
+        if query_type == 'UnitIdentifier' and prop == 'Name':
+            return True, unit.get('unit_name')
+        if query_type == 'UnitInfo':
+            info = unit.get('info', {})
+            return prop in info, info.get(prop)
+        if query_type == 'Consumption':
+            return True, json.dumps(status.get('consumption', {}))
+        if query_type == 'Sensor':
+            return _lookup(status.get('sensors', {}), prop)
+        if query_type == 'Operation':
+            return _lookup(status.get('operations', {}), prop)
+        if query_type == 'UnitStatus':
+            return _lookup(status.get('states', {}), prop)
+        return False, None
+
+    def _write(self, unit: dict, resource: list, rqp: dict):
+        if len(resource) != 2 or resource[0] != 'Operation':
+            return RSC_NOT_FOUND, None
+        operations = unit.setdefault('status', {}).setdefault('operations', {})
+        found, _ = _lookup(operations, resource[1])
+        if not found:
+            return RSC_NOT_FOUND, None
+        key = next(k for k in operations if k.lower() == resource[1].lower())
+        operations[key] = rqp.get('pc', {}).get('m2m:cin', {}).get('con')
+        return RSC_CREATED, None
+
+
+def _lookup(values: dict, key: str):
+    # The profile and the status use "powerful" while the requests use "Powerful"
+    for name, value in values.items():
+        if name.lower() == key.lower():
+            return True, value
+    return False, None
+
+
+async def _serve(args):
+    simulator = AdapterSimulator(load_fixture(args.fixture), args.bind, args.port, args.latency / 1000)
+    async with simulator:
+        print(f'Serving {args.fixture} at ws://{simulator.address}/mca')
+        await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the Daikin Altherma LAN adapter.')
+    parser.add_argument('fixture', help='fixture file written by the dump command')
+    parser.add_argument('--bind', default='127.0.0.1', help='address to listen on')
+    parser.add_argument('--port', type=int, default=8080, help='port to listen on')
+    parser.add_argument('--latency', type=float, default=0.0, help='added latency per request in milliseconds')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()